@@ -11,6 +11,13 @@ import os
 #For QQ Plot
 import scipy.stats as sts
 
+import sys
+
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\descriptive-statistics\assets')
+
+from stream_stats import StreamStats, stats_from_file
+
 #####################################################
 #============Setup the Working Directory============#
 # Set the working directory to the project folder by#
@@ -66,6 +73,29 @@ car_data.describe(include=['category'])
 
 car_data.kurt()
 
+#==============================================
+# The same statistics in one pass over each
+# file, reading a chunk of rows at a time, for
+# tables too large for read_table(); every
+# statistic comes from that single pass
+#==============================================
+ozone_stats = stats_from_file('ozone.data.txt', chunksize=50, sep='\t', sample_size=5000)
+ozone_stats.describe()
+ozone_stats.skew()
+ozone_stats.kurt()
+
+car_stats = stats_from_file('car.test.frame.txt', chunksize=20, sep='\t')
+car_stats.describe(include='all')
+car_stats.describe(include=['object'])
+car_stats.value_counts('Country')
+
+# Chunks can also be added by hand, e.g. from a
+# database query, and separate results merged
+car_stats2 = StreamStats()
+for chunk in pd.read_table('car.test.frame.txt', sep='\t', chunksize=20):
+    car_stats2.update(chunk)
+car_stats2.describe()
+
 #===================================
 # Create a simple timeseries plot
 #===================================
@@ -112,5 +142,9 @@ sts.probplot(ozone_data.rad, dist="norm", plot=plt)
 
 sts.shapiro(ozone_data.rad)
 
+# On a random sample of up to 5,000 values kept
+# during the single pass (all 111 here)
+sts.shapiro(ozone_stats.sample('rad'))
+
 ozone_data.wind.skew()
 ozone_data.wind.kurt()
\ No newline at end of file
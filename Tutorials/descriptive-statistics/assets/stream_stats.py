@@ -0,0 +1,446 @@
+#############################################
+#=========Streaming Descriptive Stats=======#
+# describe(), skew() and kurt() in a single #
+# pass over a table read in chunks, so the  #
+# table never has to fit in memory.         #
+#############################################
+
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class Moments:
+    """Count, mean, min, max and the 2nd to 4th central moments of
+    one numeric column, updated a chunk at a time.
+
+    Each chunk's moments are computed with NumPy and then combined with
+    the running totals using the pairwise update formulas of Chan and
+    Pébay, an extension of Welford's method. Summed deviations from
+    the mean stay accurate where sums of x**2, x**3, ... would lose
+    precision. Two Moments merge the same way, so chunks can be
+    processed in any number of worker processes.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = self.m3 = self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.missing = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        ok = ~np.isnan(values)
+        self.missing += int(len(values) - ok.sum())
+        values = values[ok]
+        if not len(values):
+            return self
+        part = Moments()
+        part.n = len(values)
+        part.mean = float(values.mean())
+        dev = values - part.mean
+        dev2 = dev * dev
+        part.m2 = float(dev2.sum())
+        part.m3 = float((dev2 * dev).sum())
+        part.m4 = float((dev2 * dev2).sum())
+        part.min = float(values.min())
+        part.max = float(values.max())
+        return self.merge(part)
+
+    #==========================================
+    # Combine with the moments of other rows
+    #==========================================
+    def merge(self, other):
+        na, nb = self.n, other.n
+        if nb == 0:
+            self.missing += other.missing
+            return self
+        if na == 0:
+            missing = self.missing
+            self.__dict__.update(other.__dict__)
+            self.missing += missing
+            return self
+        n = na + nb
+        delta = other.mean - self.mean
+        d_n = delta / n
+        m2 = self.m2 + other.m2 + delta * d_n * na * nb
+        m3 = (self.m3 + other.m3 + delta * d_n * d_n * na * nb * (na - nb)
+              + 3 * d_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4 + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * d_n * d_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4 * d_n * (na * other.m3 - nb * self.m3))
+        self.mean += d_n * nb
+        self.n = n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.missing += other.missing
+        return self
+
+    def var(self, ddof=1):
+        return self.m2 / (self.n - ddof) if self.n > ddof else math.nan
+
+    def std(self, ddof=1):
+        return math.sqrt(self.var(ddof))
+
+    # Bias-corrected, as Series.skew()
+    def skew(self):
+        n = self.n
+        if n < 3:
+            return math.nan
+        if self.m2 <= 1e-14 * max(self.mean * self.mean, 1.0) * n:
+            return 0.0
+        return n * math.sqrt(n - 1) / (n - 2) * self.m3 / self.m2 ** 1.5
+
+    # Bias-corrected excess kurtosis, as Series.kurt()
+    def kurt(self):
+        n = self.n
+        if n < 4:
+            return math.nan
+        if self.m2 <= 1e-14 * max(self.mean * self.mean, 1.0) * n:
+            return 0.0
+        adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return n * (n + 1) * (n - 1) * self.m4 / ((n - 2) * (n - 3) * self.m2 ** 2) - adj
+
+
+class TDigest:
+    """Approximate quantiles of a numeric column in bounded memory.
+
+    Values are kept as centroids (mean, weight). Each compression merges
+    neighbouring centroids so that roughly `compression` of them remain.
+    Centroids near the median hold many values, while those near the
+    extremes hold few or one, so the tails stay accurate. Until more
+    than `buffer_size` values have been seen nothing is
+    merged, so every centroid is a single value and `quantile()` gives
+    exactly what pandas gives (linear interpolation); small tables
+    like the ones in this tutorial are exact.
+    """
+
+    def __init__(self, compression=200, buffer_size=10000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append((values, np.ones(len(values))))
+        self._buffered += len(values)
+        if len(self.means) + self._buffered > self.buffer_size:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        other._flush()
+        if len(other.means):
+            self._buffer.append((other.means, other.weights))
+            self._buffered += len(other.means)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            if len(self.means) + self._buffered > self.buffer_size:
+                self._compress()
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        order = np.argsort(means, kind='stable')
+        self.means, self.weights = means[order], weights[order]
+        self._buffer = []
+        self._buffered = 0
+
+    #==========================================
+    # Merge neighbours: every centroid goes to
+    # bucket floor(k(q)) of the arcsine scale,
+    # which is narrow near q=0 and q=1
+    #==========================================
+    def _compress(self):
+        self._flush()
+        total = self.weights.sum()
+        before = np.cumsum(self.weights) - self.weights
+        q = (before + self.weights / 2) / total
+        k = self.compression / math.pi * np.arcsin(2 * q - 1)
+        bucket = np.floor(k - k.min()).astype('int64')
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        weights = np.add.reduceat(self.weights, starts)
+        self.means = np.add.reduceat(self.means * self.weights, starts) / weights
+        self.weights = weights
+
+    #==========================================
+    # Quantiles by linear interpolation between
+    # centroid centres; a centroid of weight w
+    # covers w consecutive ranks
+    #==========================================
+    def quantile(self, q):
+        self._flush()
+        total = self.weights.sum()
+        if total == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else math.nan
+        ranks = np.cumsum(self.weights) - self.weights + (self.weights - 1) / 2
+        xs, ys = ranks, self.means
+        if ranks[0] > 0:
+            xs, ys = np.r_[0.0, xs], np.r_[self.min, ys]
+        if ranks[-1] < total - 1:
+            xs, ys = np.r_[xs, total - 1], np.r_[ys, self.max]
+        result = np.interp(np.asarray(q, dtype='float64') * (total - 1), xs, ys)
+        return float(result) if np.ndim(result) == 0 else result
+
+
+class Reservoir:
+    """A uniform random sample of up to `size` values of a column, for
+    sts.shapiro() or a QQ plot of a table too large to load. Two
+    samples of different rows merge into a uniform sample of both."""
+
+    def __init__(self, size=5000, seed=0):
+        self.size = size
+        self.n = 0
+        self.values = np.empty(0)
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        other = Reservoir(self.size)
+        other.n = len(values)
+        other.values = values if len(values) <= self.size else self.rng.choice(values, self.size, replace=False)
+        return self.merge(other)
+
+    def merge(self, other):
+        n = self.n + other.n
+        keep = min(self.size, len(self.values) + len(other.values))
+        if n and keep:
+            # How many of the kept values come from each
+            # side follows the number of rows behind it
+            from_self = self.rng.hypergeometric(self.n, other.n, keep) if self.n and other.n else (
+                keep if self.n else 0)
+            from_self = min(from_self, len(self.values))
+            from_other = min(keep - from_self, len(other.values))
+            self.values = np.concatenate([self.rng.choice(self.values, from_self, replace=False),
+                                          self.rng.choice(other.values, from_other, replace=False)])
+        self.n = n
+        return self
+
+
+def _kind(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category'
+    if pd.api.types.is_bool_dtype(series):
+        return 'object'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'number'
+    return 'object'
+
+
+def _percentile_name(p):
+    return '%s%%' % ('%.10g' % (p * 100))
+
+
+class StreamStats:
+    """The statistics of DataFrame.describe(), skew() and kurt() for a
+    table seen one chunk at a time.
+
+    `update()` takes a chunk (a DataFrame with the same columns each
+    time). Numeric columns keep a Moments and a TDigest. Text, boolean
+    and categorical columns keep a Counter of their values. Nothing
+    else is stored, so memory depends on the number of columns and
+    distinct categories, not on the number of rows. Results from
+    separate chunks or processes are combined with `merge()`, in the
+    order of the rows so that ties for `top` are broken as in pandas.
+    """
+
+    def __init__(self, compression=200, buffer_size=10000, sample_size=0):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.sample_size = sample_size
+        self.columns = []
+        self.kinds = {}
+        self.moments = {}
+        self.digests = {}
+        self.samples = {}
+        self.counts = {}
+        self.missing = {}
+        self.rows = 0
+
+    def _add_column(self, name, kind):
+        self.columns.append(name)
+        self.kinds[name] = kind
+        self.missing[name] = 0
+        if kind == 'number':
+            self.moments[name] = Moments()
+            self.digests[name] = TDigest(self.compression, self.buffer_size)
+            if self.sample_size:
+                self.samples[name] = Reservoir(self.sample_size)
+        else:
+            self.counts[name] = Counter()
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            column = chunk[name]
+            if name not in self.kinds:
+                self._add_column(name, _kind(column))
+            if self.kinds[name] == 'number':
+                values = column.to_numpy(dtype='float64', na_value=np.nan)
+                self.moments[name].update(values)
+                self.digests[name].update(values)
+                if name in self.samples:
+                    self.samples[name].update(values)
+            else:
+                present = column.dropna()
+                self.missing[name] += len(column) - len(present)
+                # Counter keeps first-seen order, which
+                # decides ties for the most frequent value
+                self.counts[name].update(present.tolist())
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for name in other.columns:
+            if name not in self.kinds:
+                self._add_column(name, other.kinds[name])
+            self.missing[name] += other.missing[name]
+            if self.kinds[name] == 'number':
+                self.moments[name].merge(other.moments[name])
+                self.digests[name].merge(other.digests[name])
+                if name in self.samples and name in other.samples:
+                    self.samples[name].merge(other.samples[name])
+            else:
+                self.counts[name].update(other.counts[name])
+        return self
+
+    def _numeric(self):
+        return [c for c in self.columns if self.kinds[c] == 'number']
+
+    def _series(self, stat, columns=None):
+        columns = self._numeric() if columns is None else columns
+        return pd.Series([stat(self.moments[c]) for c in columns], index=columns, dtype='float64')
+
+    def count(self):
+        return pd.Series({c: self.moments[c].n if self.kinds[c] == 'number' else self.rows - self.missing[c]
+                          for c in self.columns}, dtype='int64')
+
+    def mean(self):
+        return self._series(lambda m: m.mean if m.n else math.nan)
+
+    def var(self, ddof=1):
+        return self._series(lambda m: m.var(ddof))
+
+    def std(self, ddof=1):
+        return self._series(lambda m: m.std(ddof))
+
+    def skew(self):
+        return self._series(Moments.skew)
+
+    def kurt(self):
+        return self._series(Moments.kurt)
+
+    def quantile(self, q=0.5):
+        return pd.Series({c: self.digests[c].quantile(q) for c in self._numeric()}, dtype='float64')
+
+    def value_counts(self, name):
+        counts = pd.Series(self.counts[name], dtype='int64', name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def sample(self, name):
+        return self.samples[name].values
+
+    #==========================================
+    # Same rows and columns as describe() with
+    # the same `include` choices; as in pandas,
+    # the median is only added by default
+    #==========================================
+    def describe(self, percentiles=None, include=None):
+        percentiles = [0.25, 0.5, 0.75] if percentiles is None else sorted(set(percentiles))
+        if include is None:
+            wanted = ['number'] if self._numeric() else ['object', 'category']
+        elif include == 'all':
+            wanted = ['number', 'object', 'category']
+        else:
+            include = [include] if isinstance(include, str) else list(include)
+            wanted = []
+            for kind in include:
+                kind = {np.number: 'number', object: 'object', 'O': 'object', 'str': 'object',
+                        'categorical': 'category'}.get(kind, kind)
+                if kind not in ('number', 'object', 'category'):
+                    raise ValueError("include must be 'all' or a list of 'number', 'object' and 'category'")
+                wanted.append(kind)
+        columns = [c for c in self.columns if self.kinds[c] in wanted]
+        if not columns:
+            raise ValueError('No columns of the requested types were seen')
+
+        numeric_rows = ['count', 'mean', 'std', 'min'] + [_percentile_name(p) for p in percentiles] + ['max']
+        other_rows = ['count', 'unique', 'top', 'freq']
+        stats = {}
+        for c in columns:
+            if self.kinds[c] == 'number':
+                m = self.moments[c]
+                quantiles = self.digests[c].quantile(percentiles) if m.n else [math.nan] * len(percentiles)
+                values = ([float(m.n), m.mean if m.n else math.nan, m.std(),
+                           m.min if m.n else math.nan] + list(quantiles) + [m.max if m.n else math.nan])
+                stats[c] = pd.Series(values, index=numeric_rows)
+            else:
+                counts = self.counts[c]
+                top, freq = max(counts.items(), key=lambda item: item[1]) if counts else (math.nan, math.nan)
+                stats[c] = pd.Series([self.rows - self.missing[c], len(counts), top, freq],
+                                     index=other_rows, dtype=object)
+        kinds = {self.kinds[c] for c in columns}
+        if kinds == {'number'}:
+            rows = numeric_rows
+        elif 'number' not in kinds:
+            rows = other_rows
+        else:
+            rows = other_rows + numeric_rows[1:]
+        frame = pd.concat([stats[c].reindex(rows) for c in columns], axis=1, keys=columns)
+        return frame.astype('float64') if kinds == {'number'} else frame
+
+
+def _stats_of_chunk(chunk, options):
+    return StreamStats(**options).update(chunk)
+
+
+#==============================================
+# Statistics of a delimited file read in
+# chunks of `chunksize` rows; with `workers`
+# > 1 the chunks are summarised in worker
+# processes and merged in row order.
+# Extra arguments go to pd.read_csv, e.g.
+# sep='\t'.
+#==============================================
+def stats_from_file(path, chunksize=100000, workers=1, compression=200, buffer_size=10000,
+                    sample_size=0, **read_kwargs):
+    options = {'compression': compression, 'buffer_size': buffer_size, 'sample_size': sample_size}
+    total = StreamStats(**options)
+    reader = pd.read_csv(path, chunksize=chunksize, **read_kwargs)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in reader:
+            total.update(chunk)
+        return total
+    with ProcessPoolExecutor(workers) as pool:
+        # At most two chunks per worker are read
+        # ahead, so memory stays bounded
+        pending = []
+        for chunk in reader:
+            pending.append(pool.submit(_stats_of_chunk, chunk, options))
+            if len(pending) >= 2 * workers:
+                total.merge(pending.pop(0).result())
+        for future in pending:
+            total.merge(future.result())
+    return total
@@ -3,12 +3,10 @@
 # Read in the necessary libraries.          #
 #############################################
 
-import pandas as pd
 import numpy as np
 import os
+import sys
 import requests
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
 import nltk
 from nltk.stem import PorterStemmer
 #nltk.download('punkt')
@@ -16,7 +14,7 @@ from nltk.stem import PorterStemmer
 #nltk.download('maxent_ne_chunker')
 #nltk.download('words')
 
-from nltk import word_tokenize, pos_tag, ne_chunk
+from nltk import word_tokenize, pos_tag, ne_chunk, Tree
 from nltk.chunk import conlltags2tree, tree2conlltags
 
 
@@ -32,6 +30,22 @@ os.chdir('C:\\Users\\bryan\\OneDrive - Oklahoma State University\\Teaching\\MSIS
 # office
 os.chdir('C:\\Users\\bryan\\OneDrive - Oklahoma A and M System\\Teaching\\MSIS 5193 4623 - Programming Data 1\\Data')
 
+# Helper modules from the text mining tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\assets')
+
+from tweet_loader import read_tweets
+from stem_cache import CachedStemmer
+
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\named-entity-recognition\assets')
+
+from ner_engine import NERPool, tree_entities, GEO_LABELS
+
+# Helper modules from the web scraping tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\web-scraping\assets')
+
+from browser_pool import BrowserPool, PageScraper, firefox_factory
+
 
 #################################################
 #================Tutorial Data==================#
@@ -50,18 +64,27 @@ print(ne_chunk(pos_tag(word_tokenize(sentence))))
 #===============================
 wiki_url = "https://en.wikipedia.org/wiki/Bill_Gates"
 
-driver = webdriver.Firefox(executable_path=r'C:\Users\bryan\Documents\Visual Studio 2019\geckodriver.exe')
-driver.get(wiki_url)
+# The five paragraphs to pull from the page
+wiki_spec = {'para1': '/html/body/div[3]/div[3]/div[4]/div/p[2]',
+             'para2': '/html/body/div[3]/div[3]/div[4]/div/p[3]',
+             'para3': '/html/body/div[3]/div[3]/div[4]/div/p[4]',
+             'para4': '/html/body/div[3]/div[3]/div[4]/div/p[5]',
+             'para5': '/html/body/div[3]/div[3]/div[4]/div/p[6]'}
 
-para1 = driver.find_element_by_xpath('/html/body/div[3]/div[3]/div[4]/div/p[2]')
-para2 = driver.find_element_by_xpath('/html/body/div[3]/div[3]/div[4]/div/p[3]')
-para3 = driver.find_element_by_xpath('/html/body/div[3]/div[3]/div[4]/div/p[4]')
-para4 = driver.find_element_by_xpath('/html/body/div[3]/div[3]/div[4]/div/p[5]')
-para5 = driver.find_element_by_xpath('/html/body/div[3]/div[3]/div[4]/div/p[6]')
+# The page is first downloaded without a browser;
+# headless Firefox is only started if the
+# paragraphs cannot be found that way, and then
+# all five are read with a single call
+browsers = BrowserPool(size=1, factory=firefox_factory(r'C:\Users\bryan\Documents\Visual Studio 2019\geckodriver.exe'))
+scraper = PageScraper(browsers)
 
-textbank = para1.text + para2.text + para3.text + para4.text + para5.text
+wiki_page = scraper.scrape(wiki_url, wiki_spec)
 
-driver.quit()
+textbank = ' '.join([wiki_page[name] for name in wiki_spec])
+
+scraper.stats
+
+browsers.close()
 
 #======================
 # Tokenize using POST
@@ -75,20 +98,15 @@ print(post1)
 tree1 = ne_chunk(post1)
 print(tree1)
 
-entityp = []
-entityo = []
-entityg = []
-entitydesc = []
-
-for x in str(tree1).split('\n'):
-    if 'PERSON' in x:
-        entityp.append(x)
-    elif 'ORGANIZATION' in x:
-        entityo.append(x)
-    elif 'GPE' in x or 'GSP' in x:
-        entityg.append(x)
-    elif '/NN' in x:
-        entitydesc.append(x)
+# Walk the tree and collect the named entities
+# as (label, text, start, end) tuples
+entities = tree_entities(tree1)
+
+entityp = [x for x in entities if x[0] == 'PERSON']
+entityo = [x for x in entities if x[0] == 'ORGANIZATION']
+entityg = [x for x in entities if x[0] in GEO_LABELS]
+# Nouns outside of any named entity chunk
+entitydesc = [word for word, tag in (x for x in tree1 if not isinstance(x, Tree)) if tag.startswith('NN')]
 
 entityp
 entityo
@@ -112,9 +130,7 @@ print(iob_tag)
 #===============================================
 # These steps come from the previous tutorials
 #===============================================
-tweets_data = pd.read_csv('tweets.csv')
-
-tweets_data.rename(columns={'text': 'tweettext'}, inplace=True)
+tweets_data = read_tweets('tweets.csv')
 
 tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join(x.lower() for x in x.split()))
 
@@ -124,49 +140,31 @@ tweets_data['tweettext'] = tweets_data['tweettext'].str.replace(patterndigits,''
 patternpunc = '[^\w\s]'
 tweets_data['tweettext'] = tweets_data['tweettext'].str.replace(patternpunc,'')
 
-porstem = PorterStemmer()
+# Reuse the stems saved by the text mining
+# tutorial; copy porter_stems.json into the
+# Data folder to start with a warm cache
+porstem = CachedStemmer(PorterStemmer(), cache_file='porter_stems.json')
+
+tweets_data['tweettext'] = porstem.stem_column(tweets_data['tweettext'])
 
-tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join([porstem.stem(word) for word in x.split()]))
+porstem.save()
 
 #===========================================
 # Tokenize using POST and use NER chunker;
 # this could take a lot of processing, 
 # depending on the length of the data
 #===========================================
-tweets_data['NN'] = ''
-tweets_data['JJ'] = ''
-tweets_data['VB'] = ''
-tweets_data['GEO'] = ''
-
-def tweet_ner(chunker):
-    treestruct = ne_chunk(pos_tag(word_tokenize(chunker)))
-    entitynn = []
-    entityjj = []
-    entityg_air = []
-    entityvb = []
-    for y in str(treestruct).split('\n'):
-        if 'GPE' in y or 'GSP' in y:
-            entityg_air.append(y)
-        elif '/VB' in y:
-            entityvb.append(y)
-        elif '/NN' in y:
-            entitynn.append(y)
-        elif '/JJ' in y:
-            entityjj.append(y)
-    stringnn = ''.join(entitynn)
-    stringjj = ''.join(entityjj)
-    stringvb = ''.join(entityvb)
-    stringg = ''.join(entityg_air)
-    return stringnn, stringjj, stringvb, stringg
-
-i = 0
-for x in tweets_data['tweettext']:
-    entitycontainer = tweet_ner(x)
-    tweets_data.at[i,'NN'] = entitycontainer[0]
-    tweets_data.at[i,'JJ'] = entitycontainer[1]
-    tweets_data.at[i,'VB'] = entitycontainer[2]
-    tweets_data.at[i,'GEO'] = entitycontainer[3]
-    i += 1
+# tweet_ner() lives in ner_engine.py so that it
+# can run in several processes at once; each
+# worker loads the tagger and chunker one time
+# and the tweets are handed out in chunks.
+# frame() collects the results into the columns
+# NN, JJ, VB and GEO, one row per tweet in order,
+# so they can be assigned by position in one step
+with NERPool(workers=os.cpu_count(), chunksize=250) as nerpool:
+    ner_data = nerpool.frame(tweets_data['tweettext'])
+
+tweets_data[list(ner_data.columns)] = ner_data.to_numpy()
 
 
 tweets_data['NN'].unique().tolist()
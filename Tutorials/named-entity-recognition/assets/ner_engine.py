@@ -0,0 +1,191 @@
+#############################################
+#===========Parallel NER Engine=============#
+# Run the named entity chunker over a       #
+# column of tweets using a pool of worker   #
+# processes.                                #
+#############################################
+
+import multiprocessing
+import os
+from itertools import islice
+
+import nltk
+import numpy as np
+import pandas as pd
+from nltk import Tree, word_tokenize
+from nltk.tag.perceptron import PerceptronTagger
+
+
+# Each worker process loads the tagger and the
+# chunker once and keeps them in these globals
+_tagger = None
+_chunker = None
+
+
+def _load_models():
+    global _tagger, _chunker
+    if _tagger is None:
+        _tagger = PerceptronTagger()
+    if _chunker is None:
+        try:
+            # NLTK 3.9 and later
+            from nltk.chunk import ne_chunker
+            _chunker = ne_chunker()
+        except ImportError:
+            _chunker = nltk.data.load('chunkers/maxent_ne_chunker/english_ace_multiclass.pickle')
+
+
+#================================================
+# Same as ne_chunk(pos_tag(word_tokenize(text)))
+# but without reloading the models on each call
+#================================================
+def ne_tree(text):
+    _load_models()
+    return _chunker.parse(_tagger.tag(word_tokenize(text)))
+
+
+# Chunk labels that count as geographic entities
+GEO_LABELS = ('GPE', 'GSP')
+
+# Columns produced by tweet_ner(), in order
+NER_COLUMNS = ('NN', 'JJ', 'VB', 'GEO')
+
+
+#================================================
+# Named entities as (label, text, start, end)
+# tuples, where start and end are token
+# positions in the sentence
+#================================================
+def tree_entities(tree):
+    spans = []
+    pos = 0
+    for node in tree:
+        if isinstance(node, Tree):
+            size = len(node)
+            spans.append((node.label(), ' '.join([w for w, t in node.leaves()]), pos, pos + size))
+            pos += size
+        else:
+            pos += 1
+    return spans
+
+
+#================================================
+# Split a tree into nouns, adjectives, verbs and
+# geographic entities in one walk; returns a
+# tuple of four tuples of words. Words inside
+# GPE/GSP chunks count only as geographic.
+#================================================
+def tree_categories(tree):
+    nn = []
+    jj = []
+    vb = []
+    geo = []
+    for node in tree:
+        if isinstance(node, Tree):
+            if node.label() in GEO_LABELS:
+                geo.append(' '.join([w for w, t in node.leaves()]))
+                continue
+            leaves = node.leaves()
+        else:
+            leaves = (node,)
+        for word, tag in leaves:
+            if tag.startswith('VB'):
+                vb.append(word)
+            elif tag.startswith('NN'):
+                nn.append(word)
+            elif tag.startswith('JJ'):
+                jj.append(word)
+    return tuple(nn), tuple(jj), tuple(vb), tuple(geo)
+
+
+#================================================
+# Nouns, adjectives, verbs and geographic
+# entities of a tweet, each as a string of
+# space separated words
+#================================================
+def tweet_ner(chunker):
+    return tuple(' '.join(words) for words in tree_categories(ne_tree(chunker)))
+
+
+def _ner_chunk(texts):
+    return [tweet_ner(x) for x in texts]
+
+
+def _chunks(texts, chunksize):
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+class NERPool:
+    """Process pool that runs `tweet_ner` over many tweets.
+
+    The tweets are sent to the workers in chunks of `chunksize`,
+    and `imap()` yields one result per tweet in the original order
+    as soon as each chunk is done. `workers=1` runs everything in
+    the current process, which is handy for debugging.
+
+    On Windows, worker processes re-import the main script, so use
+    the pool from an interactive session or under
+    `if __name__ == '__main__':`.
+    """
+
+    def __init__(self, workers=None, chunksize=250):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._pool = None
+
+    def __enter__(self):
+        # Load in this process first, so missing nltk
+        # data raises here instead of in every worker
+        _load_models()
+        if self.workers > 1:
+            self._pool = multiprocessing.Pool(self.workers, initializer=_load_models)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def imap(self, texts):
+        chunks = _chunks(texts, self.chunksize)
+        if self._pool is None:
+            results = map(_ner_chunk, chunks)
+        else:
+            results = self._pool.imap(_ner_chunk, chunks)
+        for chunk in results:
+            yield from chunk
+
+    def map(self, texts):
+        return list(self.imap(texts))
+
+    #=============================================
+    # Results for a pandas Series of tweets as a
+    # DataFrame with the columns NN, JJ, VB and
+    # GEO, one row per tweet in the same order
+    # and with the same index as the tweets
+    #=============================================
+    def frame(self, texts):
+        n = len(texts)
+        columns = [np.empty(n, dtype=object) for c in NER_COLUMNS]
+        for i, entitycontainer in enumerate(self.imap(texts)):
+            for col, value in zip(columns, entitycontainer):
+                col[i] = value
+        return pd.DataFrame(dict(zip(NER_COLUMNS, columns)), index=texts.index)
+
+
+#=============================================
+# Convenience wrapper: tweet_ner() for every
+# tweet, returned as a list of tuples
+#=============================================
+def ner_parallel(texts, workers=None, chunksize=250):
+    with NERPool(workers, chunksize) as pool:
+        return pool.map(texts)
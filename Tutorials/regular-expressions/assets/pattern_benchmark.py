@@ -0,0 +1,101 @@
+#############################################
+#=========Regex Throughput Benchmark========#
+# Time four ways of running findall() over  #
+# the tweets in tweets.csv:                 #
+#   - pattern compiled for every tweet      #
+#   - module function with a pattern string #
+#     (compiled once, then found in cache)  #
+#   - pattern compiled once (registry)      #
+#   - the pandas .str.findall() method      #
+#                                           #
+# python pattern_benchmark.py [tweets.csv]  #
+#        [--repeat N]                       #
+#############################################
+
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+import regex
+
+from pattern_registry import PatternRegistry
+
+# Patterns typical of tweet processing
+BENCH_PATTERNS = {
+    'mention': r'@\w+',
+    'hashtag': r'#\w+',
+    'url': r'https?://\S+',
+    'email': r"([a-z\.-]+)@([a-z\.-]+)\.(com|edu)",
+    'digits_punc': r'\b[0-9]+\b|[^\w\s]',
+}
+
+DEFAULT_TWEETS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', '..', 'text-mining', 'data', 'tweets.csv')
+
+
+# Best of `rounds` runs, in seconds
+def best_time(func, rounds=3):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+#==========================================
+# Compile the pattern again for every text;
+# purge() empties re's cache, which would
+# otherwise hand back the compiled pattern
+#==========================================
+def compile_each(pattern, texts):
+    found = []
+    for t in texts:
+        re.purge()
+        found.append(re.compile(pattern).findall(t))
+    return found
+
+
+#==========================================
+# One row per pattern and method with the
+# time and tweets per second
+#==========================================
+def run_benchmark(texts, patterns=BENCH_PATTERNS, rounds=3):
+    registry = PatternRegistry()
+    column = pd.Series(texts)
+    rows = []
+    for name, pattern in patterns.items():
+        registry.register(name, pattern)
+        methods = {
+            're.compile each call': lambda: compile_each(pattern, texts),
+            # Compiled on the first call, then looked
+            # up in the module's cache on every call
+            're.findall(str, cached)': lambda: [re.findall(pattern, t) for t in texts],
+            'regex.findall(str, cached)': lambda: [regex.findall(pattern, t) for t in texts],
+            'registry.findall_column': lambda: registry.findall_column(name, column),
+            'Series.str.findall': lambda: column.str.findall(pattern),
+        }
+        for method, func in methods.items():
+            seconds = best_time(func, rounds)
+            rows.append({'pattern': name, 'engine': registry.engine(name), 'method': method,
+                         'seconds': seconds, 'tweets_per_sec': len(texts) / seconds})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare ways of running a regex over many tweets.')
+    parser.add_argument('path', nargs='?', default=DEFAULT_TWEETS)
+    parser.add_argument('--repeat', type=int, default=1, help='copies of the tweets, for a larger input')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    texts = pd.read_csv(args.path, usecols=['text'])['text'].tolist() * args.repeat
+    results = run_benchmark(texts, rounds=args.rounds)
+    print('%d tweets' % len(texts))
+    print(results.pivot(index='pattern', columns='method', values='seconds').round(4).to_string())
+
+
+if __name__ == '__main__':
+    main()
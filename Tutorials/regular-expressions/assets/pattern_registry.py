@@ -0,0 +1,162 @@
+#############################################
+#=========Compiled Pattern Registry=========#
+# Compile each named pattern once, with re  #
+# when it is enough and regex when the      #
+# pattern needs its extra features.         #
+#############################################
+
+import re
+import warnings
+from functools import lru_cache
+
+import pandas as pd
+
+# regex is optional; without it only patterns
+# that re understands can be registered
+try:
+    import regex
+except ImportError:
+    regex = None
+
+# Syntax that re accepts without an error but
+# reads differently from regex: fuzzy matching
+# such as (cat){e<=1} and POSIX classes
+_REGEX_ONLY = re.compile(r'\{[^}]*\b[eids]\s*<|\[\[:\^?[a-z]+:\]\]')
+
+
+#==========================================
+# Compile with re if it understands the
+# pattern, otherwise with regex; returns
+# (compiled pattern, engine name). Bytes
+# patterns work too, for binary files.
+#==========================================
+@lru_cache(maxsize=512)
+def compile_pattern(pattern, flags=0, engine=None):
+    if engine is None:
+        text = pattern.decode('latin-1') if isinstance(pattern, bytes) else pattern
+        engine = 'regex' if _REGEX_ONLY.search(text) else 're'
+        if engine == 're':
+            try:
+                # "Possible nested set" and similar
+                # warnings mean re misreads the pattern
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error')
+                    return re.compile(pattern, flags), 're'
+            except (re.error, FutureWarning, DeprecationWarning):
+                engine = 'regex'
+    if engine == 're':
+        return re.compile(pattern, flags), 're'
+    if engine != 'regex':
+        raise ValueError("engine must be 're' or 'regex', not %r" % engine)
+    if regex is None:
+        raise ImportError('the regex module is needed for %r' % pattern)
+    return regex.compile(pattern, flags), 'regex'
+
+
+class PatternRegistry:
+    """Named patterns, each compiled once when it is registered.
+
+    `engine` picks 're' or 'regex' for a pattern; by default the
+    registry uses re, which is faster for simple patterns, and falls
+    back to regex for syntax only regex understands (\\p{...}, fuzzy
+    matching, recursion, ...). The bulk functions take a whole pandas
+    column or an open file and reuse the compiled pattern for every
+    string.
+    """
+
+    def __init__(self, patterns=None):
+        self._patterns = {}
+        for name, pattern in (patterns or {}).items():
+            self.register(name, pattern)
+
+    def register(self, name, pattern, flags=0, engine=None):
+        compiled, engine = compile_pattern(pattern, flags, engine)
+        self._patterns[name] = (compiled, engine)
+        return compiled
+
+    def __getitem__(self, name):
+        return self._patterns[name][0]
+
+    def __contains__(self, name):
+        return name in self._patterns
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def names(self):
+        return sorted(self._patterns)
+
+    def engine(self, name):
+        return self._patterns[name][1]
+
+    # Same calls as the re/regex module functions,
+    # with a registered name instead of a pattern
+    def match(self, name, string):
+        return self[name].match(string)
+
+    def search(self, name, string):
+        return self[name].search(string)
+
+    def findall(self, name, string):
+        return self[name].findall(string)
+
+    def finditer(self, name, string):
+        return self[name].finditer(string)
+
+    #==========================================
+    # findall() over every string in a pandas
+    # column; missing values give an empty
+    # list. Returns a Series of lists.
+    #==========================================
+    def findall_column(self, name, column):
+        findall = self[name].findall
+        return pd.Series([findall(s) if isinstance(s, str) else [] for s in column.tolist()],
+                         index=column.index, name=column.name)
+
+    # Number of matches in every string
+    def count_column(self, name, column):
+        findall = self[name].findall
+        return pd.Series([len(findall(s)) if isinstance(s, str) else 0 for s in column.tolist()],
+                         index=column.index, name=column.name, dtype='int64')
+
+    #==========================================
+    # Named groups of every match as a table:
+    # one row per match, with the index of the
+    # string it came from
+    #==========================================
+    def extract_column(self, name, column):
+        finditer = self[name].finditer
+        rows, index = [], []
+        for key, s in zip(column.index, column.tolist()):
+            if isinstance(s, str):
+                for m in finditer(s):
+                    rows.append(m.groupdict())
+                    index.append(key)
+        return pd.DataFrame(rows, index=pd.Index(index, name=column.index.name),
+                            columns=list(self[name].groupindex))
+
+    #==========================================
+    # Matches in a file or any stream of lines,
+    # read one line at a time; yields
+    # (line number, match object)
+    #==========================================
+    def finditer_stream(self, name, lines):
+        finditer = self[name].finditer
+        for number, line in enumerate(lines, 1):
+            for m in finditer(line):
+                yield number, m
+
+    def findall_file(self, name, path, encoding='utf-8'):
+        with open(path, encoding=encoding) as f:
+            return [m.group() for _, m in self.finditer_stream(name, f)]
+
+
+# The patterns used in regex example.py
+patterns = PatternRegistry({
+    'cat': r"[Cc]at.",
+    'dog': r"[Dd][Oo][Gg]",
+    'email': r"([a-z\.-]+)@([a-z\.-]+)\.(com|edu)",
+    'cat_words': r"(cat){1}([a-z]*)",
+    'ptags': r"<p><a href=\"mailto:([a-z\.-]+)@([a-z\.-]+)\.(com|edu)\?subject=\">([a-z\.-]+)@([a-z\.-]+)\.(com|edu)</a></p>",
+    'ptags_named': r"<p><a href=\"mailto:(?P<username>[a-z\.-]+)@(?P<business>[a-z\.-]+)\.(?P<entitytype>com|edu)\?subject=\">([a-z\.-]+)@([a-z\.-]+)\.(com|edu)</a></p>",
+})
@@ -4,8 +4,15 @@
 #############################################
 
 #import re
+import sys
 import regex
 
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\regular-expressions\assets')
+
+from pattern_registry import patterns
+from stream_extract import StreamExtractor, EMAIL_PATTERN
+
 
 #############################################
 #===========Regex Matched Object============#
@@ -126,6 +133,77 @@ for i in regex.finditer(reg_ptags2,reg_string4):
     print(i.group('username'), i.group('business'), i.group('entitytype'))
 
 
+#############################################
+#=============Compiled Patterns=============#
+# Each regex.findall(pattern, text) call    #
+# looks the pattern up again. A registry    #
+# compiles every named pattern once.        #
+#############################################
+
+# The patterns above, already compiled
+patterns.names()
+
+patterns.search('cat', reg_string1)
+patterns.findall('cat_words', reg_string3)
+
+for i in patterns.finditer('ptags_named', reg_string4):
+    print(i.group('username'), i.group('business'), i.group('entitytype'))
+
+# New patterns get a name; re is used when it
+# understands the pattern, regex otherwise
+patterns.register('mention', r'@\w+')
+patterns.register('word', r'\p{L}+')
+patterns.engine('mention')
+patterns.engine('word')
+
+# One compiled pattern applied to every
+# Tweet in a pandas column
+import pandas as pd
+tweets = pd.read_csv(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\data\tweets.csv')
+
+mentions = patterns.findall_column('mention', tweets['text'])
+mentions.head()
+
+patterns.count_column('mention', tweets['text']).value_counts()
+
+# Named groups as a table, one row per match
+patterns.extract_column('ptags_named', pd.Series([reg_string4]))
+
+# Compare the speed of the different ways of
+# running findall() over all the Tweets from
+# a command prompt:
+# python pattern_benchmark.py
+
+
+#############################################
+#=========Extracting from Large Files=======#
+# Saved web pages can be far larger than    #
+# memory. StreamExtractor scans a file a    #
+# piece at a time and writes each new match #
+# to a CSV file as soon as it is found.     #
+#############################################
+
+# Save the html from above as a small file
+with open('directory.html', 'w') as f:
+    f.write(reg_string4)
+
+# EMAIL_PATTERN is reg_ptags2; its named
+# groups become the columns of the CSV file
+extractor = StreamExtractor(EMAIL_PATTERN)
+
+for record in extractor.records('directory.html'):
+    print(record)
+
+# Write the unique email addresses of one or
+# more files to a CSV file
+extractor = StreamExtractor(EMAIL_PATTERN)
+with open('emails.csv', 'w', newline='') as out:
+    extractor.extract(['directory.html'], out)
+
+# Or from a command prompt:
+# python stream_extract.py page1.html page2.html -o emails.csv
+
+
 #############################################
 #=========Regex Splitting Strings===========#
 # The following examples use the function   #
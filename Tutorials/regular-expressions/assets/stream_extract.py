@@ -0,0 +1,182 @@
+#############################################
+#=========Streaming Regex Extractor=========#
+# Run a pattern over files too large to     #
+# read into memory, a window at a time, and #
+# write each new match to a CSV file.       #
+#                                           #
+# python stream_extract.py pages.html       #
+#        -o emails.csv                      #
+#############################################
+
+import argparse
+import csv
+import mmap
+import sys
+
+from pattern_registry import compile_pattern
+
+# reg_ptags2 from regex example.py; the groups
+# username, business and entitytype are saved
+EMAIL_PATTERN = (r"<p><a href=\"mailto:(?P<username>[a-z\.-]+)@(?P<business>[a-z\.-]+)"
+                 r"\.(?P<entitytype>com|edu)\?subject=\">([a-z\.-]+)@([a-z\.-]+)\.(com|edu)</a></p>")
+
+
+class StreamExtractor:
+    """finditer() over a file or stream in windows of `chunk_size` bytes.
+
+    Files are memory-mapped and scanned in place with the pattern's
+    pos/endpos arguments; streams that cannot be mapped (pipes, stdin,
+    gzip files) are read in chunks. A match that might continue past
+    the end of a window is held back and found again in the next one,
+    so no match is lost or cut in two at a boundary as long as no match
+    is longer than `overlap` bytes. Memory stays at about one window
+    plus the set of distinct results kept for `dedupe`.
+    """
+
+    def __init__(self, pattern, fields=None, chunk_size=1 << 24, overlap=1 << 16,
+                 dedupe=True, encoding='utf-8'):
+        if isinstance(pattern, str):
+            pattern = pattern.encode(encoding)
+        self.pattern = compile_pattern(pattern)[0]
+        # Named groups by default, else the whole match
+        self.fields = list(fields or self.pattern.groupindex or ['match'])
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.dedupe = dedupe
+        self.encoding = encoding
+        self.seen = set()
+
+    #==========================================
+    # Matches in buffer[start:end]; returns
+    # the ones that are safe to emit and the
+    # position the next window starts from
+    #==========================================
+    def _scan(self, buffer, start, end, final):
+        limit = end if final else max(start, end - self.overlap)
+        found = []
+        for m in self.pattern.finditer(buffer, start, end):
+            if m.end() > limit and not final:
+                # May be cut short by the window;
+                # rescan from its start next time
+                return found, m.start()
+            found.append(m)
+        return found, limit
+
+    #==========================================
+    # Yields (byte offset, match) for a file,
+    # memory-mapped when possible
+    #==========================================
+    def finditer_file(self, path):
+        with open(path, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Empty files and pipes cannot be mapped
+                yield from self.finditer_stream(f)
+                return
+            with mapped:
+                size = len(mapped)
+                start = 0
+                window = self.chunk_size
+                while True:
+                    end = min(size, start + window)
+                    found, next_start = self._scan(mapped, start, end, end == size)
+                    for m in found:
+                        yield m.start(), m
+                    if end == size:
+                        break
+                    # A match held back at the very start
+                    # needs a larger window to fit
+                    window = window * 2 if next_start == start else self.chunk_size
+                    start = next_start
+
+    #==========================================
+    # Same for any binary stream: the held
+    # back tail is carried into the next chunk
+    #==========================================
+    def finditer_stream(self, stream):
+        carry = b''
+        offset = 0
+        while True:
+            chunk = stream.read(self.chunk_size)
+            final = not chunk
+            buffer = carry + chunk
+            found, next_start = self._scan(buffer, 0, len(buffer), final)
+            for m in found:
+                yield offset + m.start(), m
+            if final:
+                break
+            carry = buffer[next_start:]
+            offset += next_start
+
+    #==========================================
+    # One dict per match (or per new match
+    # when deduplicating), with the offset of
+    # its first occurrence
+    #==========================================
+    def records(self, source):
+        if isinstance(source, str):
+            matches = self.finditer_file(source)
+        else:
+            matches = self.finditer_stream(source)
+        fields = self.fields
+        for offset, m in matches:
+            if fields == ['match']:
+                values = (m.group(),)
+            else:
+                values = m.group(*fields) if len(fields) > 1 else (m.group(fields[0]),)
+            values = tuple(v.decode(self.encoding, 'replace') if v is not None else '' for v in values)
+            if self.dedupe:
+                if values in self.seen:
+                    continue
+                self.seen.add(values)
+            record = dict(zip(fields, values))
+            record['offset'] = offset
+            yield record
+
+    #==========================================
+    # Write the records to CSV as they are
+    # found; several sources can be appended
+    # to one file. Returns the rows written.
+    #==========================================
+    def extract(self, sources, out, flush_every=1000):
+        if isinstance(sources, str):
+            sources = [sources]
+        writer = csv.DictWriter(out, fieldnames=self.fields + ['offset', 'source'],
+                                lineterminator='\n')
+        writer.writeheader()
+        count = 0
+        for source in sources:
+            name = source if isinstance(source, str) else getattr(source, 'name', '')
+            for record in self.records(source):
+                record['source'] = name
+                writer.writerow(record)
+                count += 1
+                if count % flush_every == 0:
+                    out.flush()
+        out.flush()
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract email addresses (or any pattern) from large files.')
+    parser.add_argument('files', nargs='*', help='files to scan; none reads stdin')
+    parser.add_argument('-o', '--output', default='-', help='CSV file; default stdout')
+    parser.add_argument('-p', '--pattern', default=EMAIL_PATTERN)
+    parser.add_argument('--all', action='store_true', help='keep repeated matches')
+    parser.add_argument('--overlap', type=int, default=1 << 16, help='longest possible match in bytes')
+    args = parser.parse_args(argv)
+
+    extractor = StreamExtractor(args.pattern, overlap=args.overlap, dedupe=not args.all)
+    sources = args.files or [sys.stdin.buffer]
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        count = extractor.extract(sources, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print('%d rows written' % count, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
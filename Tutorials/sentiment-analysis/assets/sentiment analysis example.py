@@ -1,16 +1,23 @@
 # This is a continuation of the previous tutorial.
-# Run the code from the previous tutorial prior
-# to running this tutorial
+# Either run the code from the previous tutorial
+# prior to running this tutorial, or load the
+# cleaned tweets it saved (see below)
 
 #############################################
 #=============Read in Libraries=============#
 # Read in the necessary libraries.          #
 #############################################
 
+import os
+import sys
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -20,6 +27,41 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, plot_confusion_matrix
 
+os.chdir(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\data')
+
+# Helper modules from the text mining tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\assets')
+
+from tweet_cleaning import TweetCleaner
+from stem_cache import CachedStemmer
+from corpus_cache import prepare_corpus
+
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\sentiment-analysis\assets')
+
+from streaming_sentiment import StreamingTfidf, train_streaming, frame_batches, predict_streaming
+from topic_sweep import sweep, online_lda
+from topic_report import TopicReport
+from train_harness import evaluate, cross_validate, summarize, write_records
+from sentiment_model import SentimentModel
+
+
+#################################################
+#================Tutorial Data==================#
+# Load the tweets cleaned in the text mining    #
+# tutorial; they are only cleaned again if      #
+# tweets.csv or these settings changed          #
+#################################################
+stop = stopwords.words('english')
+
+airline_names = ['americanair','southwestair','jetblue','virginamerica','usairways','united']
+
+cleaner = TweetCleaner(stopwords=stop, extra_words=airline_names)
+porstem = CachedStemmer(PorterStemmer(), cache_file='porter_stems.json')
+
+tweets_data = prepare_corpus('tweets.csv', cleaner, porstem)
+
+
 #################################################
 #==============Exploratory Analysis=============#
 # Perform some exploratory analysis to better   #
@@ -72,23 +114,22 @@ doc_term_matrix.shape
 LDA = LatentDirichletAllocation(n_components=5, random_state=35)
 LDA.fit(doc_term_matrix)
 
-# Retrieve words in the first topic
-first_topic = LDA.components_[0]
+# TopicReport reads the vocabulary once and
+# picks the top words of all topics at once
+lda_report = TopicReport(vectorizer)
 
-# Sort the indexes according to probability 
-# values using argsort()
-top_topic_words = first_topic.argsort()[-10:]
-
-# Output the words to the console screen
-for i in top_topic_words:
-    print(vectorizer.get_feature_names()[i])
+# Retrieve the top 10 words in the first topic,
+# from highest to lowest probability
+lda_words = lda_report.words(LDA, k=10)
+lda_words.loc[0].tolist()
 
 # Print the 10 words with highest 
 # probabilities for all five topics
-for i,topic in enumerate(LDA.components_):
-    print(f'Top 10 words for topic #{i}:')
-    print([vectorizer.get_feature_names()[i] for i in topic.argsort()[-10:]])
-    print('\n')
+lda_report.print_topics(LDA, k=10)
+
+# The same words with their weights as a table,
+# e.g. to save with to_csv()
+lda_report.table(LDA, k=10)
 
 # Add a column in the dataset with the topic number
 topic_values = LDA.transform(doc_term_matrix)
@@ -110,17 +151,13 @@ nmf = NMF(n_components=5, random_state=42)
 
 nmf.fit(doc_term_matrix2)
 
-first_topic = nmf.components_[0]
-top_topic_words = first_topic.argsort()[-10:]
+nmf_report = TopicReport(tfidf_vect)
 
-for i in top_topic_words:
-    print(tfidf_vect.get_feature_names()[i])
+nmf_words = nmf_report.words(nmf, k=10)
+nmf_words.loc[0].tolist()
 
 # Top 10 words for each topic
-for i,topic in enumerate(nmf.components_):
-    print(f'Top 10 words for topic #{i}:')
-    print([tfidf_vect.get_feature_names()[i] for i in topic.argsort()[-10:]])
-    print('\n')
+nmf_report.print_topics(nmf, k=10)
 
 # Add a column with the topic values. 
 topic_values2 = nmf.transform(doc_term_matrix2)
@@ -128,6 +165,28 @@ tweets_data['topic2'] = topic_values2.argmax(axis=1)
 tweets_data.head()
 
 
+#==================================================
+# Choose the number of topics: fit a model for
+# each topic count at the same time, one per
+# processor core. Lower perplexity (LDA) or
+# reconstruction error (NMF) is better.
+#==================================================
+lda_sweep = sweep(doc_term_matrix, n_components=range(3, 13), model='lda', random_state=35)
+lda_sweep.results
+
+nmf_sweep = sweep(doc_term_matrix2, n_components=range(3, 13), model='nmf', random_state=42)
+nmf_sweep.results
+
+# Each fitted model is kept, e.g. LDA with 8 topics
+LDA8 = lda_sweep.models[('lda', 8)]
+
+# For corpora too large to fit in one go, use
+# online LDA, which learns from one batch of
+# tweets at a time
+batches = (doc_term_matrix[start:start + 2000] for start in range(0, doc_term_matrix.shape[0], 2000))
+LDA_online = online_lda(batches, n_components=5, random_state=35)
+
+
 #################################################
 #=======Sentiment Analysis Classification=======#
 # Perform an analysis based on the sentiment    #
@@ -147,7 +206,9 @@ features = tweets_data['tweettext']
 # but at least in 7 documents
 vectorizer = TfidfVectorizer (max_features=2500, min_df=7, max_df=0.8, stop_words=stop)
 
-processed_features = vectorizer.fit_transform(features).toarray()
+# Keep the TF-IDF matrix sparse; train_test_split
+# and RandomForestClassifier both accept it as is
+processed_features = vectorizer.fit_transform(features)
 
 #==========================================
 # Generate a training and testing dataset
@@ -159,8 +220,9 @@ labels = tweets_data['airline_sentiment']
 X_train, X_test, y_train, y_test = train_test_split(processed_features, labels, test_size=0.2, random_state=0)
 
 # Train a machine learning model, randomforest, using
-# the training dataset
-text_classifier = RandomForestClassifier(n_estimators=200, random_state=0)
+# the training dataset; n_jobs=-1 builds the trees
+# on all of the cores
+text_classifier = RandomForestClassifier(n_estimators=200, random_state=0, n_jobs=-1)
 text_classifier.fit(X_train, y_train)
 
 # Time to test the model using the predict() function
@@ -180,3 +242,82 @@ print(classification_report(y_test,predictions))
 
 print(accuracy_score(y_test, predictions))
 # Result: Accuracy of 75.7%
+
+#=====================================
+# Timing, memory and metrics as one
+# record per run, saved as JSON Lines
+#=====================================
+rf_record = evaluate(RandomForestClassifier(n_estimators=200, random_state=0, n_jobs=-1),
+                     X_train, y_train, X_test, y_test, features='tfidf 2500')
+
+rf_record['fit_time']
+rf_record['peak_rss_mb']
+rf_record['peak_rss_growth_mb']
+rf_record['report']['macro avg']
+
+write_records(rf_record, 'model_runs.jsonl')
+
+# 5-fold cross validation using KFold, with
+# the folds trained in parallel
+cv_records = cross_validate(RandomForestClassifier(n_estimators=200, random_state=0),
+                            processed_features, labels, n_splits=5, workers=5,
+                            features='tfidf 2500')
+
+summarize(cv_records)
+
+write_records(cv_records, 'model_runs.jsonl')
+
+# Read all of the runs back to compare them
+runs = pd.read_json('model_runs.jsonl', lines=True)
+runs[['model', 'features', 'fold', 'accuracy', 'fit_time', 'peak_rss_growth_mb', 'model_bytes']]
+
+#=====================================
+# Save the fitted model so new tweets
+# can be scored without retraining
+#=====================================
+sentiment_model = SentimentModel(vectorizer, text_classifier, cleaner, porstem)
+sentiment_model.save('sentiment_model')
+
+# Load it back (e.g. in a new session) and
+# score raw, uncleaned tweets
+sentiment_model = SentimentModel.load('sentiment_model')
+sentiment_model.predict_confidence(['@united lost my bag again, worst airline ever',
+                                    '@SouthwestAir thanks for the great flight!'])
+
+# Or score a whole file from the command line:
+# python sentiment_model.py sentiment_model tweets.csv -o scores.csv
+
+# To score tweets as they arrive, serve the saved
+# model on localhost from a command prompt:
+# python sentiment_service.py sentiment_model --port 8765
+# and send batches of tweets to it, e.g. with:
+# from sentiment_service import score_remote
+# score_remote(['@united lost my bag again'], 'http://127.0.0.1:8765/score')
+
+
+#################################################
+#==========Out-of-Core Classification===========#
+# Train a model over batches of tweets with a   #
+# fixed amount of memory, using hashed features #
+# and a linear classifier with partial_fit()    #
+#################################################
+
+# Same 80/20 split as above, on the raw text
+features_train, features_test, y_train2, y_test2 = train_test_split(features, labels, test_size=0.2, random_state=0)
+
+# Batches of 1,000 tweets; to read the batches
+# straight from a file on disk instead, use
+# tweet_batches('tweets.csv', cleaner, porstem)
+train_batches = frame_batches(features_train.tolist(), y_train2.tolist(), batch_size=1000)
+
+stream_vect, stream_classifier = train_streaming(train_batches,
+                                                 classes=np.array(['negative', 'neutral', 'positive']),
+                                                 vectorizer=StreamingTfidf(stop_words=stop))
+
+predictions2 = predict_streaming(stream_vect, stream_classifier, features_test.tolist())
+
+print(classification_report(y_test2, predictions2))
+
+print(accuracy_score(y_test2, predictions2))
+# Result: Accuracy of about 78% compared to 76%
+# for the random forest
@@ -0,0 +1,197 @@
+#############################################
+#=========Saved Sentiment Model=============#
+# Save the fitted vectorizer and classifier #
+# with the cleaning settings, load them     #
+# back and score new tweets in batches.     #
+#                                           #
+# Batch scoring from the command line:      #
+# python sentiment_model.py model_dir       #
+#        tweets.csv -o scores.csv           #
+#############################################
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import joblib
+import nltk.stem
+import numpy as np
+import sklearn
+
+# Helper modules from the text-mining tutorial,
+# found next to this folder so the command line
+# works from anywhere
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, os.pardir, 'text-mining', 'assets'))
+
+from stem_cache import CachedStemmer
+from tweet_cleaning import TweetCleaner
+
+
+class SentimentModel:
+    """A fitted vectorizer and classifier plus the cleaning pipeline.
+
+    `save()` writes a folder with one joblib file per fitted object
+    (uncompressed, so the vectorizer's arrays can be memory-mapped on
+    load), the stemmer's cache and a manifest.json with the cleaner
+    and stemmer settings, so `predict()` cleans new tweets the same way
+    as the training data.
+    """
+
+    def __init__(self, vectorizer, classifier, cleaner, stemmer):
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.cleaner = cleaner
+        self.stemmer = stemmer
+
+    @property
+    def classes(self):
+        return self.classifier.classes_
+
+    #==========================================
+    # Raw tweets -> cleaned and stemmed text
+    #==========================================
+    def prepare(self, texts):
+        return [self.stemmer.stem_text(t) for t in self.cleaner.clean_many(texts)]
+
+    def transform(self, texts):
+        return self.vectorizer.transform(self.prepare(texts))
+
+    def predict(self, texts):
+        return self.classifier.predict(self.transform(texts))
+
+    #==========================================
+    # Labels and the probability of each label
+    # from a single call to the classifier
+    #==========================================
+    def predict_confidence(self, texts):
+        proba = self.classifier.predict_proba(self.transform(texts))
+        best = proba.argmax(axis=1)
+        return self.classes[best], proba[np.arange(len(best)), best]
+
+    def manifest(self):
+        return {'cleaner': self.cleaner.config(),
+                'stemmer': self.stemmer.config(),
+                'vectorizer': type(self.vectorizer).__name__,
+                'classifier': type(self.classifier).__name__,
+                'classes': [str(c) for c in self.classes],
+                'sklearn': sklearn.__version__}
+
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        joblib.dump(self.vectorizer, os.path.join(folder, 'vectorizer.joblib'))
+        joblib.dump(self.classifier, os.path.join(folder, 'classifier.joblib'))
+        self.stemmer.save(os.path.join(folder, 'stems.json'))
+        with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(), f, indent=2)
+        return folder
+
+    #==========================================
+    # Load a saved folder; mmap_mode='r' maps
+    # the vectorizer's arrays (IDF weights)
+    # instead of reading them in. The trees of
+    # a random forest are always copied into
+    # memory by sklearn, mapped or not
+    #==========================================
+    @classmethod
+    def load(cls, folder, mmap_mode='r'):
+        with open(os.path.join(folder, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['sklearn'] != sklearn.__version__:
+            print('Warning: model saved with sklearn %s, running %s'
+                  % (manifest['sklearn'], sklearn.__version__), file=sys.stderr)
+
+        settings = manifest['cleaner']
+        cleaner = TweetCleaner(settings['stopwords'], settings['extra_words'], settings['lowercase'])
+        if cleaner.config() != settings:
+            raise ValueError('%s was saved with a different cleaning pattern' % folder)
+        # e.g. PorterStemmer or WordNetLemmatizer
+        stemmer = CachedStemmer(getattr(nltk.stem, manifest['stemmer']['stemmer'])(),
+                                cache_file=os.path.join(folder, 'stems.json'))
+
+        vectorizer = joblib.load(os.path.join(folder, 'vectorizer.joblib'), mmap_mode=mmap_mode)
+        classifier = joblib.load(os.path.join(folder, 'classifier.joblib'), mmap_mode=mmap_mode)
+        return cls(vectorizer, classifier, cleaner, stemmer)
+
+
+#==============================================
+# Raw tweets from a file or stream in batches:
+# a CSV with a `text` column (the tweets.csv
+# layout) gives (tweet_id, text) rows, any
+# other input is read as one tweet per line
+#==============================================
+def read_batches(stream, batch_size=5000):
+    first = stream.readline()
+    header = next(csv.reader([first]), [])
+    if 'text' in header:
+        rows = csv.DictReader(stream, fieldnames=header)
+        records = ((row.get('tweet_id', ''), row['text']) for row in rows)
+    else:
+        lines = (line.rstrip('\r\n') for line in _chain_first(first, stream))
+        records = (('', line) for line in lines if line)
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _chain_first(first, stream):
+    if first:
+        yield first
+    yield from stream
+
+
+#==============================================
+# Score every tweet in `stream` and write
+# tweet_id, sentiment and confidence as CSV;
+# returns (tweets scored, seconds taken)
+#==============================================
+def score_stream(model, stream, out, batch_size=5000):
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['tweet_id', 'sentiment', 'confidence'])
+    count = 0
+    start = time.perf_counter()
+    for batch in read_batches(stream, batch_size):
+        ids, texts = zip(*batch)
+        labels, confidence = model.predict_confidence(list(texts))
+        writer.writerows(zip(ids, labels, np.round(confidence, 4)))
+        count += len(batch)
+    return count, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score tweets with a saved sentiment model.')
+    parser.add_argument('model_dir', help='folder written by SentimentModel.save()')
+    parser.add_argument('input', nargs='?', default='-', help='tweets file; - or omitted reads stdin')
+    parser.add_argument('-o', '--output', default='-', help='CSV file for the scores; default stdout')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    model = SentimentModel.load(args.model_dir)
+    cold_start = time.perf_counter() - start
+
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline='')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        count, seconds = score_stream(model, stream, out, args.batch_size)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print('Cold start: %.3f s' % cold_start, file=sys.stderr)
+    print('Scored %d tweets in %.3f s (%.0f tweets/sec)'
+          % (count, seconds, count / seconds if seconds else 0), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+#############################################
+#=========Sentiment Scoring Service=========#
+# Score tweets over HTTP on localhost.      #
+# Requests that arrive close together are   #
+# scored in one call to the model.          #
+#                                           #
+# python sentiment_service.py model_dir     #
+# POST /score  {"texts": ["...", ...]}      #
+# GET  /metrics                             #
+#############################################
+
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from collections import deque
+
+import numpy as np
+
+from sentiment_model import SentimentModel
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            413: 'Payload Too Large', 500: 'Internal Server Error',
+            503: 'Service Unavailable'}
+
+
+class LatencyStats:
+    """Request latencies (in seconds) of the last `window` requests."""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rejected = 0
+        self.tweets = 0
+        self.batches = 0
+
+    def add(self, seconds, tweets):
+        self.latencies.append(seconds)
+        self.requests += 1
+        self.tweets += tweets
+
+    def summary(self):
+        if self.latencies:
+            latencies = np.fromiter(self.latencies, float) * 1000
+            p50, p99 = (float(x) for x in np.percentile(latencies, [50, 99]))
+        else:
+            p50 = p99 = None
+        return {'requests': self.requests, 'rejected': self.rejected,
+                'tweets': self.tweets, 'batches': self.batches,
+                'mean_batch': self.tweets / self.batches if self.batches else None,
+                'p50_ms': p50, 'p99_ms': p99}
+
+
+class SentimentService:
+    """Micro-batching HTTP front end for a `SentimentModel`.
+
+    Each request is put on a bounded queue. The batcher takes the first
+    waiting request, then keeps collecting for up to `window` seconds or
+    until `max_batch` tweets, and scores them all with one call to the
+    vectorizer and classifier. When `max_queue` requests are already
+    waiting, new ones are turned away with 503 so the caller can retry.
+    """
+
+    def __init__(self, model, host='127.0.0.1', port=8765, max_batch=512,
+                 window=0.005, max_queue=1000, max_body=1 << 22):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.window = window
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self.stats = LatencyStats()
+        self.server = None
+        self._queue = None
+        self._batcher = None
+        self._pending = set()
+
+    #==========================================
+    # Collect requests for one batch: wait for
+    # the first, then gather until the window
+    # closes or the batch is full
+    #==========================================
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.window
+        while size < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for item in batch for text in item[0]]
+            try:
+                # The model runs in a thread so the
+                # server keeps accepting requests
+                labels, confidence = await loop.run_in_executor(
+                    None, self.model.predict_confidence, texts)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.stats.batches += 1
+            start = 0
+            for request_texts, future in batch:
+                end = start + len(request_texts)
+                if not future.done():
+                    future.set_result({'labels': [str(x) for x in labels[start:end]],
+                                       'confidence': [round(float(x), 4) for x in confidence[start:end]]})
+                start = end
+
+    #==========================================
+    # Queue the texts of one request and wait
+    # for its share of the batch results
+    #==========================================
+    async def score(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((texts, future))
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return await future
+
+    async def _handle_score(self, body):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'body must be JSON'}
+        texts = payload.get('texts') if isinstance(payload, dict) else payload
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return 400, {'error': 'expected {"texts": [str, ...]}'}
+        if not texts:
+            return 200, {'labels': [], 'confidence': []}
+        start = time.perf_counter()
+        try:
+            result = await self.score(texts)
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            return 503, {'error': 'too many requests waiting, retry later'}
+        self.stats.add(time.perf_counter() - start, len(texts))
+        return 200, result
+
+    async def _respond(self, method, path, body):
+        if method == 'POST' and path == '/score':
+            return await self._handle_score(body)
+        if method == 'GET' and path == '/metrics':
+            metrics = self.stats.summary()
+            metrics['queued'] = self._queue.qsize()
+            return 200, metrics
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': 'unknown path %s' % path}
+
+    #==========================================
+    # Minimal HTTP/1.1: one JSON request and
+    # response at a time, keep-alive unless
+    # the client asks to close
+    #==========================================
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    method = path = None
+                headers = {}
+                # Past a malformed request line, answer 400
+                # without waiting for headers
+                while method is not None:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                keep_alive = False
+                if method is None or length < 0:
+                    status, result = 400, {'error': 'malformed request line or Content-Length'}
+                elif length > self.max_body:
+                    status, result = 413, {'error': 'body larger than %d bytes' % self.max_body}
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, result = await self._respond(method, path.split('?')[0], body)
+                    except Exception as error:
+                        # The model failed, or the service stopped
+                        status, result = 500, {'error': '%s: %s' % (type(error).__name__, error)}
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+
+                data = json.dumps(result).encode('utf-8')
+                writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+                              'Content-Length: %d\r\nConnection: %s\r\n\r\n'
+                              % (status, _REASONS[status], len(data),
+                                 'keep-alive' if keep_alive else 'close')).encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batcher = asyncio.create_task(self._run_batches())
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        return self
+
+    #==========================================
+    # Stop accepting connections and the
+    # batcher; requests still waiting for a
+    # score are answered with 500
+    #==========================================
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._batcher.cancel()
+        await asyncio.gather(self._batcher, return_exceptions=True)
+        for future in list(self._pending):
+            if not future.done():
+                future.set_exception(RuntimeError('service stopped'))
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def serve_forever(self):
+        await self.start()
+        print('Scoring on http://%s:%d/score' % (self.host, self.port))
+        async with self.server:
+            await self.server.serve_forever()
+
+
+#==============================================
+# Client side: score a list of tweets with a
+# running service, e.g. from a collector
+#==============================================
+def score_remote(texts, url='http://127.0.0.1:8765/score', timeout=30):
+    request = urllib.request.Request(url, data=json.dumps({'texts': list(texts)}).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a saved sentiment model on localhost.')
+    parser.add_argument('model_dir', help='folder written by SentimentModel.save()')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=512, help='most tweets per model call')
+    parser.add_argument('--window', type=float, default=0.005, help='seconds to wait to fill a batch')
+    parser.add_argument('--max-queue', type=int, default=1000, help='requests waiting before 503')
+    args = parser.parse_args(argv)
+
+    service = SentimentService(SentimentModel.load(args.model_dir), port=args.port,
+                               max_batch=args.max_batch, window=args.window,
+                               max_queue=args.max_queue)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#############################################
+#=========Out-of-Core Sentiment Model=======#
+# Hash the tweets into a fixed number of    #
+# features, accumulate the IDF batch by     #
+# batch, and train with partial_fit().      #
+#############################################
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import normalize
+
+
+class StreamingTfidf:
+    """TF-IDF over hashed features, fitted one batch at a time.
+
+    Unlike TfidfVectorizer there is no vocabulary to hold in memory:
+    every term is hashed into one of `n_features` columns, and only a
+    document-frequency count per column is kept. Columns seen in
+    fewer than `min_df` documents get a weight of zero.
+    """
+
+    def __init__(self, n_features=2 ** 18, min_df=2, stop_words=None, ngram_range=(1, 2)):
+        self.n_features = n_features
+        self.min_df = min_df
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None,
+                                        stop_words=stop_words, ngram_range=ngram_range)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+    #=====================================
+    # Add one batch of tweets to the
+    # document-frequency counts
+    #=====================================
+    def partial_fit(self, texts):
+        counts = self.hasher.transform(texts)
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        return self
+
+    # Smoothed IDF, as in TfidfVectorizer
+    @property
+    def idf_(self):
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+        idf[self.doc_freq < self.min_df] = 0
+        return idf
+
+    def transform(self, texts):
+        counts = self.hasher.transform(texts)
+        return normalize(counts @ sp.diags(self.idf_), norm='l2', copy=False)
+
+
+#==============================================
+# Train a linear classifier over batches of
+# (texts, labels). `batches` is a function
+# that returns a fresh iterator each time it
+# is called, since the data is read once to
+# count terms and then once per epoch.
+#==============================================
+def train_streaming(batches, classes, vectorizer=None, classifier=None, epochs=5):
+    vectorizer = vectorizer or StreamingTfidf()
+    # modified_huber also gives predict_proba()
+    classifier = classifier or SGDClassifier(loss='modified_huber', alpha=1e-4, random_state=0)
+    for texts, labels in batches():
+        vectorizer.partial_fit(texts)
+    for epoch in range(epochs):
+        for texts, labels in batches():
+            classifier.partial_fit(vectorizer.transform(texts), labels, classes=classes)
+    return vectorizer, classifier
+
+
+#==============================================
+# Split a pair of Series (or lists) into
+# batches of `batch_size`; a stand-in for
+# reading batches from disk with read_tweets
+#==============================================
+def frame_batches(texts, labels, batch_size=1000):
+    def batches():
+        for start in range(0, len(texts), batch_size):
+            yield (texts[start:start + batch_size], labels[start:start + batch_size])
+    return batches
+
+
+#==============================================
+# Batches read straight from tweets.csv and
+# cleaned on the fly; needs the text-mining
+# assets folder on sys.path
+#==============================================
+def tweet_batches(path, cleaner, stemmer, chunksize=5000):
+    from tweet_loader import read_tweets
+
+    def batches():
+        for chunk in read_tweets(path, usecols=['tweet_id', 'airline_sentiment', 'text'], chunksize=chunksize):
+            texts = stemmer.stem_column(cleaner.clean_column(chunk['tweettext']))
+            yield texts.tolist(), chunk['airline_sentiment'].astype(str).tolist()
+    return batches
+
+
+#==============================================
+# Predict in batches; returns one array
+#==============================================
+def predict_streaming(vectorizer, classifier, texts, batch_size=10000):
+    out = [classifier.predict(vectorizer.transform(texts[start:start + batch_size]))
+           for start in range(0, len(texts), batch_size)]
+    return np.concatenate(out) if out else np.empty(0, dtype=object)
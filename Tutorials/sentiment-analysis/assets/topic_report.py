@@ -0,0 +1,64 @@
+#############################################
+#===========Top Words per Topic=============#
+# Pick the highest weighted words of every  #
+# topic at once and return them as a table. #
+#############################################
+
+import numpy as np
+import pandas as pd
+
+from sparse_dtm import feature_names
+
+
+class TopicReport:
+    """Top-k words for every topic of a fitted LDA or NMF model.
+
+    The vocabulary is read from the vectorizer once and kept as a
+    NumPy array, and `argpartition` selects the k largest weights
+    of all topics in one call instead of sorting each row.
+    """
+
+    def __init__(self, vectorizer):
+        self.vocab = feature_names(vectorizer)
+
+    #===============================================
+    # Column indices of the k largest weights per
+    # row, ordered from largest to smallest
+    #===============================================
+    @staticmethod
+    def top_indices(components, k=10):
+        components = np.asarray(components)
+        k = min(k, components.shape[1])
+        top = np.argpartition(components, -k, axis=1)[:, -k:]
+        rows = np.arange(components.shape[0])[:, None]
+        order = np.argsort(-components[rows, top], axis=1)
+        return top[rows, order]
+
+    #===============================================
+    # Table with one row per topic and one column
+    # per rank: word_1 is the top word
+    #===============================================
+    def words(self, model, k=10):
+        top = self.top_indices(model.components_, k)
+        return pd.DataFrame(self.vocab[top],
+                            columns=['word_%d' % (i + 1) for i in range(top.shape[1])],
+                            index=pd.RangeIndex(top.shape[0], name='topic'))
+
+    #===============================================
+    # Long format: topic, rank, word and weight;
+    # handy for exporting with to_csv()
+    #===============================================
+    def table(self, model, k=10):
+        components = np.asarray(model.components_)
+        top = self.top_indices(components, k)
+        rows = np.arange(top.shape[0])[:, None]
+        return pd.DataFrame({'topic': np.repeat(np.arange(top.shape[0]), top.shape[1]),
+                             'rank': np.tile(np.arange(1, top.shape[1] + 1), top.shape[0]),
+                             'word': self.vocab[top].ravel(),
+                             'weight': components[rows, top].ravel()})
+
+    def print_topics(self, model, k=10):
+        for i, row in self.words(model, k).iterrows():
+            print(f'Top {k} words for topic #{i}:')
+            print(row.tolist())
+            print('\n')
@@ -0,0 +1,131 @@
+#############################################
+#============Topic Model Sweep==============#
+# Fit LDA or NMF for a range of topic       #
+# counts in parallel and report the fit     #
+# quality and time of each.                 #
+#############################################
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.decomposition import NMF, LatentDirichletAllocation
+
+
+#==============================================
+# Write a CSR matrix to .npy files so worker
+# processes can memory-map it instead of each
+# receiving a pickled copy
+#==============================================
+def share_matrix(matrix, folder):
+    matrix = sp.csr_matrix(matrix, dtype=np.float64)
+    # Sorted, duplicate-free indices; the workers'
+    # read-only copies cannot be fixed up in place
+    matrix.sum_duplicates()
+    np.save(os.path.join(folder, 'data.npy'), matrix.data)
+    np.save(os.path.join(folder, 'indices.npy'), matrix.indices)
+    np.save(os.path.join(folder, 'indptr.npy'), matrix.indptr)
+    np.save(os.path.join(folder, 'shape.npy'), np.array(matrix.shape))
+    return folder
+
+
+def load_shared(folder):
+    def part(name):
+        return np.load(os.path.join(folder, name + '.npy'), mmap_mode='r')
+    shape = tuple(np.load(os.path.join(folder, 'shape.npy')))
+    matrix = sp.csr_matrix((part('data'), part('indices'), part('indptr')), shape=shape, copy=False)
+    matrix.has_canonical_format = True
+    return matrix
+
+
+def _make_model(config):
+    params = dict(config)
+    kind = params.pop('model')
+    if kind == 'lda':
+        # One core per model; the sweep itself is parallel
+        params.setdefault('n_jobs', 1)
+        return LatentDirichletAllocation(**params)
+    if kind == 'nmf':
+        return NMF(**params)
+    raise ValueError("model must be 'lda' or 'nmf', not %r" % kind)
+
+
+#==============================================
+# Fit one configuration; runs in a worker
+#==============================================
+def _fit_one(folder, config):
+    matrix = load_shared(folder)
+    model = _make_model(config)
+    start = time.perf_counter()
+    model.fit(matrix)
+    record = dict(config)
+    record['fit_time'] = time.perf_counter() - start
+    if config['model'] == 'lda':
+        record['perplexity'] = model.perplexity(matrix)
+    else:
+        record['reconstruction_err'] = model.reconstruction_err_
+    return record, model
+
+
+class TopicSweep:
+    """Fit one topic model per configuration in a process pool.
+
+    The document-term matrix is written once to a temporary folder
+    and memory-mapped by every worker. After `run()`, `results` holds
+    one row per configuration and `models` the fitted models, keyed
+    by (model, n_components).
+    """
+
+    def __init__(self, matrix, workers=None):
+        self.matrix = matrix
+        self.workers = workers or os.cpu_count() or 1
+        self.results = None
+        self.models = {}
+
+    def run(self, configs):
+        folder = tempfile.mkdtemp(prefix='topic_sweep_')
+        try:
+            share_matrix(self.matrix, folder)
+            with ProcessPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(_fit_one, folder, c) for c in configs]
+                records = []
+                for future in futures:
+                    record, model = future.result()
+                    records.append(record)
+                    self.models[(record['model'], record['n_components'])] = model
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        self.results = pd.DataFrame(records)
+        return self.results
+
+
+#==============================================
+# Sweep a range of topic counts for one model;
+# extra keyword arguments go to the model, e.g.
+# learning_method='online' for large corpora
+#==============================================
+def sweep(matrix, n_components, model='lda', workers=None, **params):
+    configs = [dict(params, model=model, n_components=k) for k in n_components]
+    topic_sweep = TopicSweep(matrix, workers)
+    topic_sweep.run(configs)
+    return topic_sweep
+
+
+#==============================================
+# Online (mini-batch) LDA over batches of a
+# document-term matrix, e.g. rows read from
+# disk; pass an already fitted model to keep
+# training it on new batches (warm start)
+#==============================================
+def online_lda(batches, n_components=5, model=None, **params):
+    if model is None:
+        params.setdefault('learning_method', 'online')
+        model = LatentDirichletAllocation(n_components=n_components, **params)
+    for batch in batches:
+        model.partial_fit(batch)
+    return model
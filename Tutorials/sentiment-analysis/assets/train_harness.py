@@ -0,0 +1,146 @@
+#############################################
+#========Classifier Training Harness========#
+# Train and evaluate a classifier on a      #
+# sparse TF-IDF matrix, with optional       #
+# parallel k-fold cross validation, and     #
+# report each run as one JSON record.       #
+#############################################
+
+import json
+import pickle
+import sys
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import KFold
+
+# resource is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+#==========================================
+# Peak resident memory of this process so
+# far in MB, or None where it cannot be
+# measured; the peak of its whole lifetime,
+# not of the last run
+#==========================================
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    if sys.platform == 'darwin':
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+# Size of the pickled model in bytes
+def model_size(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+#==========================================
+# Fit one model and score it on the test
+# set; returns the record for the run.
+# peak_rss_growth_mb is how far the run
+# raised the process peak: 0 when an
+# earlier run in the same process (or the
+# same joblib worker) went higher.
+#==========================================
+def evaluate(model, X_train, y_train, X_test, y_test, name=None, **info):
+    peak_before = peak_rss_mb()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    record = {'model': name or type(model).__name__,
+              'params': {k: v for k, v in model.get_params().items() if _is_plain(v)},
+              'n_train': X_train.shape[0],
+              'n_test': X_test.shape[0],
+              'n_features': X_train.shape[1],
+              'fit_time': fit_time,
+              'predict_time': predict_time,
+              'wall_time': fit_time + predict_time,
+              'peak_rss_mb': peak,
+              'peak_rss_growth_mb': None if peak is None else peak - peak_before,
+              'model_bytes': model_size(model),
+              'accuracy': accuracy_score(y_test, predictions),
+              'report': classification_report(y_test, predictions, output_dict=True, zero_division=0)}
+    record.update(info)
+    return record
+
+
+def _is_plain(value):
+    return value is None or isinstance(value, (bool, int, float, str))
+
+
+def _fit_fold(model, X, y, train, test, fold, name, info):
+    return evaluate(model, X[train], y[train], X[test], y[test], name=name, fold=fold, **info)
+
+
+#==========================================
+# k-fold cross validation with the folds
+# trained in parallel, one record per fold.
+# Each worker already uses one core, so the
+# model's own n_jobs is set to 1.
+#==========================================
+def cross_validate(model, X, y, n_splits=5, workers=None, shuffle=True, random_state=0, name=None, **info):
+    y = np.asarray(y)
+    kf = KFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state if shuffle else None)
+    workers = workers or 1
+    if workers != 1 and 'n_jobs' in model.get_params():
+        model = clone(model).set_params(n_jobs=1)
+    name = name or type(model).__name__
+    jobs = (delayed(_fit_fold)(clone(model), X, y, train, test, fold, name, info)
+            for fold, (train, test) in enumerate(kf.split(X)))
+    start = time.perf_counter()
+    records = Parallel(n_jobs=workers)(jobs)
+    wall_time = time.perf_counter() - start
+    for record in records:
+        record['cv_wall_time'] = wall_time
+        record['workers'] = workers
+    return records
+
+
+#==========================================
+# Averages of the fold records, e.g. to
+# compare two settings at a glance
+#==========================================
+def summarize(records):
+    keys = ('accuracy', 'fit_time', 'predict_time', 'model_bytes')
+    summary = {k: float(np.mean([r[k] for r in records])) for k in keys}
+    summary['accuracy_std'] = float(np.std([r['accuracy'] for r in records]))
+    summary['macro_f1'] = float(np.mean([r['report']['macro avg']['f1-score'] for r in records]))
+    summary['folds'] = len(records)
+    return summary
+
+
+def _json_default(value):
+    # NumPy scalars from sklearn's reports
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+#==========================================
+# Append the records to a JSON Lines file,
+# one line per run
+#==========================================
+def write_records(records, path):
+    if isinstance(records, dict):
+        records = [records]
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=_json_default) + '\n')
+    return path
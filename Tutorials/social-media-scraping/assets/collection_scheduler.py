@@ -0,0 +1,309 @@
+#############################################
+#===========Collection Scheduler============#
+# Collect the timelines and searches of     #
+# many accounts at once, within a global    #
+# and a per-endpoint call budget, stalest   #
+# accounts first, each tweet saved once.    #
+#############################################
+
+import heapq
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from tweet_collector import DEFAULT_LIMITS, ENDPOINT_PATHS, WINDOW, TweetCollector
+
+
+class ApiError(Exception):
+    """An error answer; args[0] is the API's list of errors, as with
+    python-twitter's TwitterError."""
+
+
+class TokenBucket:
+    """Up to `capacity` calls at once, refilled at `rate` calls per
+    second; TokenBucket(900 / 900, 900) allows 900 calls per 15
+    minutes without making them wait for the window to roll over.
+
+    With a `parent` bucket every call takes a token from both, which
+    is how the per-endpoint buckets share one global budget. It has
+    the same delay/wait/update/block methods as RateWindow.
+    """
+
+    def __init__(self, rate, capacity, parent=None, clock=time.time, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.parent = parent
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _pause(self, now):
+        self._refill(now)
+        pause = self.blocked_until - now
+        if self.tokens < 1:
+            pause = max(pause, (1 - self.tokens) / self.rate)
+        return max(0.0, pause)
+
+    # Seconds until a call is allowed
+    def delay(self):
+        with self.lock:
+            pause = self._pause(self.clock())
+        return max(pause, self.parent.delay()) if self.parent else pause
+
+    def wait(self):
+        waited = 0.0
+        while True:
+            with self.lock:
+                pause = self._pause(self.clock())
+                if pause <= 0:
+                    self.tokens -= 1
+                    break
+            self.sleep(pause)
+            waited += pause
+        if self.parent:
+            waited += self.parent.wait()
+        return waited
+
+    # The API's own count of the calls left
+    def update(self, remaining, reset):
+        if remaining is None:
+            return
+        with self.lock:
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, float(reset))
+
+    def block(self, seconds=None):
+        with self.lock:
+            self.tokens = 0.0
+            self.blocked_until = self.clock() + (seconds or self.capacity / self.rate)
+
+
+class _RateLimits:
+    # Like python-twitter's api.rate_limit
+    def __init__(self):
+        self.endpoints = {}
+
+    def get_limit(self, url):
+        return self.endpoints.get(url)
+
+
+class JsonApi:
+    """GetUserTimeline and GetSearch spoken straight to an API v1.1
+    address, returning the tweets as dicts. `base_url` can point to
+    fake_twitter_api.py for testing, or to the real API with an app's
+    `bearer_token`. The rate limit headers of every answer are kept in
+    `rate_limit`, which the collectors read."""
+
+    def __init__(self, base_url='https://api.twitter.com/1.1', bearer_token=None, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.bearer_token = bearer_token
+        self.timeout = timeout
+        self.rate_limit = _RateLimits()
+
+    def _get(self, path, query):
+        url = '%s/%s' % (self.base_url, path)
+        request = Request('%s?%s' % (url, query))
+        if self.bearer_token:
+            request.add_header('Authorization', 'Bearer %s' % self.bearer_token)
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                headers, body = response.headers, response.read()
+        except HTTPError as exc:
+            headers, body = exc.headers, exc.read()
+            try:
+                errors = json.loads(body)['errors']
+            except (ValueError, KeyError, TypeError):
+                errors = [{'code': exc.code, 'message': exc.reason}]
+            self._keep_limit(url, headers)
+            raise ApiError(errors)
+        self._keep_limit(url, headers)
+        return json.loads(body)
+
+    def _keep_limit(self, url, headers):
+        if headers is not None and headers.get('x-rate-limit-remaining') is not None:
+            self.rate_limit.endpoints[url] = {'limit': int(headers['x-rate-limit-limit']),
+                                              'remaining': int(headers['x-rate-limit-remaining']),
+                                              'reset': int(headers['x-rate-limit-reset'])}
+
+    @staticmethod
+    def _query(params):
+        return urlencode({k: v for k, v in params.items() if v is not None})
+
+    def GetUserTimeline(self, screen_name=None, since_id=None, max_id=None, count=200, **params):
+        params.update(screen_name=screen_name, since_id=since_id, max_id=max_id, count=count)
+        return self._get(ENDPOINT_PATHS['timeline'], self._query(params))
+
+    def GetSearch(self, term=None, raw_query=None, since_id=None, max_id=None, count=100, **params):
+        if raw_query is not None:
+            query = raw_query
+        else:
+            params.update(q=term, since_id=since_id, max_id=max_id, count=count)
+            query = self._query(params)
+        return self._get(ENDPOINT_PATHS['search'], query)['statuses']
+
+
+class CollectionScheduler(TweetCollector):
+    """Run many collector jobs at once on `workers` threads.
+
+    Every call takes a token from its endpoint's bucket (`limits`
+    calls per `window`, DEFAULT_LIMITS by default) and, with
+    `global_limit`, from one bucket shared by all endpoints. The jobs
+    wait in a queue per endpoint, stalest first: the job whose last
+    complete pass is oldest, or that never finished one, goes first,
+    and keeps its place until it has paged to the end. A free worker
+    takes the stalest job of an endpoint that has calls left, so a
+    spent search budget does not hold up the timelines.
+
+    Cursors, checkpoints and the output file work as in
+    TweetCollector; tweets found by several jobs are written once.
+    `metrics()` reports throughput and the backlog while it runs.
+    """
+
+    def __init__(self, api, writer, checkpoint='scheduler_state.json', limits=None, global_limit=None,
+                 workers=4, window=WINDOW, clock=time.time, sleep=time.sleep):
+        super().__init__(api, writer, checkpoint, limits, window, clock, sleep)
+        limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.budget = None
+        if global_limit:
+            self.budget = TokenBucket(global_limit / window, global_limit, None, clock, sleep)
+        self.windows = {name: TokenBucket(limit / window, limit, self.budget, clock, sleep)
+                        for name, limit in limits.items()}
+        self.workers = workers
+        self.queues = {name: [] for name in self.windows}
+        self.in_flight = 0
+        self.errors = {}
+        self.started = None
+        self._seen_before = 0
+        self._ready = threading.Condition(self._lock)
+        self._stop = False
+        self.stats.update({'pages': 0, 'jobs_done': 0, 'errors': 0})
+
+    #==========================================
+    # Stalest job of an endpoint that can call
+    # now, else of the one that can call first;
+    # the caller holds the lock
+    #==========================================
+    def _next_job(self):
+        heads = [(queue[0], name) for name, queue in self.queues.items() if queue]
+        if not heads:
+            return None
+        delays = {name: self.windows[name].delay() for _, name in heads}
+        ready = [head for head in heads if delays[head[1]] == 0]
+        entry, name = min(ready) if ready else min(heads, key=lambda head: delays[head[1]])
+        return heapq.heappop(self.queues[name])
+
+    def _worker(self, counts, pages):
+        while True:
+            with self._ready:
+                entry = None if self._stop else self._next_job()
+                while entry is None and self.in_flight and not self._stop:
+                    self._ready.wait()
+                    entry = self._next_job()
+                if entry is None:
+                    self._ready.notify_all()
+                    return
+                self.in_flight += 1
+            job = entry[2]
+            more = False
+            try:
+                state = self._job_state(job)
+                statuses = self._call(job, state['since_id'], state['max_id'])
+                found = self._advance(job, statuses)
+                with self._lock:
+                    pages[job.key] += 1
+                    self.stats['pages'] += 1
+                    if found is None:
+                        self.stats['jobs_done'] += 1
+                    else:
+                        counts[job.key] += found
+                        more = job.max_pages is None or pages[job.key] < job.max_pages
+            except Exception as exc:
+                # One failing account does not stop the rest
+                with self._lock:
+                    self.errors[job.key] = repr(exc)
+                    self.stats['errors'] += 1
+            finally:
+                with self._ready:
+                    self.in_flight -= 1
+                    if more:
+                        heapq.heappush(self.queues[job.endpoint], entry)
+                    self._ready.notify_all()
+
+    #==========================================
+    # Run the jobs to the end (or max_pages);
+    # `report` is called with metrics() every
+    # `report_every` seconds, e.g. report=print.
+    # Returns the tweets collected per job.
+    #==========================================
+    def run(self, jobs, report=None, report_every=30):
+        counts = {job.key: 0 for job in jobs}
+        pages = dict.fromkeys(counts, 0)
+        with self._lock:
+            self.started = self.clock()
+            self._seen_before = len(self.writer.seen)
+            self._stop = False
+            for seq, job in enumerate(jobs):
+                state = self._job_state(job)
+                heapq.heappush(self.queues[job.endpoint], (state['completed'] or 0, seq, job))
+        threads = [threading.Thread(target=self._worker, args=(counts, pages), daemon=True)
+                   for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(report_every if report else None)
+                    if report and thread.is_alive():
+                        report(self.metrics())
+        finally:
+            # On Ctrl+C the workers finish their current
+            # call and the queues are dropped; the
+            # checkpoint has the cursors for next time
+            with self._ready:
+                self._stop = True
+                for queue in self.queues.values():
+                    queue.clear()
+                self._ready.notify_all()
+            self.writer.flush()
+            self._save()
+        if report:
+            report(self.metrics())
+        return counts
+
+    #==========================================
+    # Throughput since run() started and the
+    # work still waiting
+    #==========================================
+    def metrics(self):
+        with self._lock:
+            elapsed = self.clock() - self.started if self.started else 0.0
+            new = len(self.writer.seen) - self._seen_before
+            queued = {name: len(queue) for name, queue in self.queues.items()}
+            per_sec = 1 / elapsed if elapsed > 0 else 0.0
+            return {'elapsed': round(elapsed, 1),
+                    'calls': self.stats['calls'],
+                    'pages': self.stats['pages'],
+                    'tweets': self.stats['tweets'],
+                    'new_tweets': new,
+                    'duplicates': self.stats['tweets'] - new,
+                    'tweets_per_sec': round(self.stats['tweets'] * per_sec, 1),
+                    'calls_per_sec': round(self.stats['calls'] * per_sec, 2),
+                    'queued': queued,
+                    'in_flight': self.in_flight,
+                    'backlog': sum(queued.values()) + self.in_flight,
+                    'jobs_done': self.stats['jobs_done'],
+                    'errors': self.stats['errors'],
+                    'rate_limited': self.stats['rate_limited'],
+                    # Summed over the workers
+                    'waited': round(self.stats['waited'], 1)}
@@ -0,0 +1,203 @@
+#############################################
+#=============Fake Twitter API==============#
+# A local stand-in for the timeline and     #
+# search endpoints, rate limits included,   #
+# to try the collectors without API keys.   #
+#                                           #
+# python fake_twitter_api.py --port 8010    #
+#############################################
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = ['flight', 'delayed', 'gate', 'crew', 'thanks', 'bag', 'lost', 'cancelled', 'seat',
+         'great', 'service', 'late', 'again', 'love', 'worst', 'help', 'jfk', 'lax', 'ord', 'dfw']
+LOCATIONS = ['Tulsa, OK', 'Boston', 'NYC', 'San Francisco, CA', '', 'Dallas, TX']
+TIME_ZONES = ['Central Time (US & Canada)', 'Eastern Time (US & Canada)',
+              'Pacific Time (US & Canada)', None]
+
+# Tweet ids are handed out in time order from
+# here, one second apart
+FIRST_ID = 10 ** 15
+FIRST_TIME = 1546300800
+
+
+class FakeTwitter:
+    """Made-up tweets for any screen name, served like API v1.1.
+
+    Every account gets `tweets_per_account` tweets the first time it
+    is asked for (always the same ones for the same `seed`); `post()`
+    adds newer tweets. Search looks for the term in the text of every
+    tweet made so far. Each endpoint allows `limits` calls per
+    `window` seconds and then answers 429 with error code 88, and
+    `latency` seconds are added to every answer.
+    """
+
+    def __init__(self, tweets_per_account=500, limits=None, window=900, latency=0.0, seed=0):
+        self.tweets_per_account = tweets_per_account
+        self.limits = dict({'statuses/user_timeline.json': 900, 'search/tweets.json': 180}, **(limits or {}))
+        self.window = window
+        self.latency = latency
+        self.seed = seed
+        self.timelines = {}
+        self.next_id = FIRST_ID
+        self.calls = {path: deque() for path in self.limits}
+        self.lock = threading.Lock()
+
+    def _status(self, name, rng):
+        status_id = self.next_id
+        self.next_id += 1
+        created = datetime.fromtimestamp(FIRST_TIME + status_id - FIRST_ID, timezone.utc)
+        text = '@%s %s' % (name, ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))))
+        point = None
+        if rng.random() < 0.1:
+            point = {'type': 'Point', 'coordinates': [round(rng.uniform(-122, -71), 6),
+                                                      round(rng.uniform(30, 47), 6)]}
+        return {'id': status_id, 'id_str': str(status_id),
+                'created_at': created.strftime('%a %b %d %H:%M:%S %z %Y'),
+                'text': text, 'retweet_count': rng.randint(0, 3), 'coordinates': point,
+                'user': {'screen_name': name, 'location': rng.choice(LOCATIONS),
+                         'time_zone': rng.choice(TIME_ZONES)}}
+
+    # Newest first, as the API returns them
+    def timeline(self, name):
+        with self.lock:
+            if name not in self.timelines:
+                rng = random.Random('%s:%s' % (self.seed, name))
+                tweets = [self._status(name, rng) for _ in range(self.tweets_per_account)]
+                self.timelines[name] = tweets[::-1]
+            return self.timelines[name]
+
+    def post(self, name, count=1):
+        tweets = self.timeline(name)
+        with self.lock:
+            rng = random.Random('%s:%s:%d' % (self.seed, name, len(tweets)))
+            new = [self._status(name, rng) for _ in range(count)]
+            self.timelines[name] = new[::-1] + tweets
+        return new
+
+    @staticmethod
+    def _page(tweets, params, default_count):
+        since_id = int(params.get('since_id', 0))
+        max_id = int(params['max_id']) if 'max_id' in params else None
+        count = min(int(params.get('count', default_count)), 200)
+        page = []
+        for status in tweets:
+            if max_id is not None and status['id'] > max_id:
+                continue
+            if status['id'] <= since_id or len(page) == count:
+                break
+            page.append(status)
+        return page
+
+    #==========================================
+    # Count the call against its endpoint;
+    # returns (allowed, rate limit headers)
+    #==========================================
+    def _take(self, path):
+        now = time.time()
+        with self.lock:
+            calls = self.calls[path]
+            while calls and calls[0] <= now - self.window:
+                calls.popleft()
+            allowed = len(calls) < self.limits[path]
+            if allowed:
+                calls.append(now)
+            reset = int((calls[0] if calls else now) + self.window) + 1
+            headers = {'x-rate-limit-limit': self.limits[path],
+                       'x-rate-limit-remaining': self.limits[path] - len(calls),
+                       'x-rate-limit-reset': reset}
+        return allowed, headers
+
+    # Returns (status code, body, headers)
+    def answer(self, path, params):
+        if self.latency:
+            time.sleep(self.latency)
+        if path not in self.limits:
+            return 404, {'errors': [{'code': 34, 'message': 'Sorry, that page does not exist.'}]}, {}
+        allowed, headers = self._take(path)
+        if not allowed:
+            return 429, {'errors': [{'code': 88, 'message': 'Rate limit exceeded'}]}, headers
+        if path == 'statuses/user_timeline.json':
+            if 'screen_name' not in params:
+                return 400, {'errors': [{'code': 44, 'message': 'screen_name parameter is missing.'}]}, headers
+            return 200, self._page(self.timeline(params['screen_name']), params, 20), headers
+        term = params.get('q', '').lower()
+        with self.lock:
+            tweets = [s for timeline in self.timelines.values() for s in timeline]
+        tweets.sort(key=lambda s: s['id'], reverse=True)
+        found = self._page([s for s in tweets if term in s['text'].lower()], params, 15)
+        return 200, {'statuses': found, 'search_metadata': {'count': len(found), 'query': term}}, headers
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            path = parts.path.split('/1.1/', 1)[-1].lstrip('/')
+            params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            status, body, headers = fake.answer(path, params)
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+#==============================================
+# Serve `fake` in a background thread; the
+# API is then at http://host:port/1.1
+#==============================================
+def serve(fake=None, host='127.0.0.1', port=8010):
+    fake = fake or FakeTwitter()
+    server = ThreadingHTTPServer((host, port), _handler(fake))
+    server.daemon_threads = True
+    server.fake = fake
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve made-up tweets like the Twitter API v1.1.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--tweets', type=int, default=500, help='tweets per account')
+    parser.add_argument('--timeline-limit', type=int, default=900)
+    parser.add_argument('--search-limit', type=int, default=180)
+    parser.add_argument('--window', type=float, default=900, help='rate limit window in seconds')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every answer')
+    args = parser.parse_args(argv)
+
+    fake = FakeTwitter(args.tweets, {'statuses/user_timeline.json': args.timeline_limit,
+                                     'search/tweets.json': args.search_limit},
+                       args.window, args.latency)
+    server = ThreadingHTTPServer((args.host, args.port), _handler(fake))
+    server.daemon_threads = True
+    print('Fake Twitter API at http://%s:%d/1.1' % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
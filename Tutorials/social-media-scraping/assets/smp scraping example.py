@@ -4,8 +4,21 @@
 # and query data                                #
 #################################################
 
+import sys
+
 import twitter
 
+# Helper modules from the text mining tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\assets')
+
+from tweet_loader import read_tweets
+
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\social-media-scraping\assets')
+
+from tweet_collector import Job, TweetCollector
+from collection_scheduler import CollectionScheduler, JsonApi
+
 apikey = 'yourconsumersecret'
 apisecretkey = 'yourconsumersecretkey'
 accesstok = 'youraccesstoken'
@@ -41,4 +54,41 @@ twitteruser = 'BYUfootball'
 tweet5 = twitconn.GetUserTimeline(screen_name=twitteruser,
                                   count=200,
                                   include_rts=False,
-                                  exclude_replies=True)
\ No newline at end of file
+                                  exclude_replies=True)
+
+
+# Every tweet the API still serves, not only
+# the first page; run it again later to add
+# only the new tweets
+collector = TweetCollector(twitconn, 'byu_tweets.csv', checkpoint='byu_state.json')
+collector.run([Job('timeline', twitteruser, include_rts=False, exclude_replies=True),
+               Job('search', 'q=from%3ABYUfootball%20stadium')])
+collector.stats
+
+byutweets = read_tweets('byu_tweets.csv')
+
+
+# Many accounts at once: the timeline of every
+# airline, plus the tweets mentioning it
+airline_names = ['americanair','southwestair','jetblue','virginamerica','usairways','united']
+# The airline column uses the labels of
+# tweets.csv, which files @jetblue under Delta
+airlines = {'americanair': 'American', 'southwestair': 'Southwest', 'jetblue': 'Delta',
+            'virginamerica': 'Virgin America', 'usairways': 'US Airways', 'united': 'United'}
+
+airline_jobs = [Job('timeline', handle, airlines[handle], include_rts=False) for handle in airline_names]
+airline_jobs += [Job('search', '@' + handle, airlines[handle]) for handle in airline_names]
+
+scheduler = CollectionScheduler(twitconn, 'airline_tweets.csv', checkpoint='airline_state.json',
+                                workers=4, global_limit=1000)
+scheduler.run(airline_jobs, report=print, report_every=60)
+scheduler.metrics()
+
+# To practice without API keys, start the fake
+# API in a terminal first:
+#   python fake_twitter_api.py --port 8010
+fakeconn = JsonApi('http://127.0.0.1:8010/1.1')
+scheduler = CollectionScheduler(fakeconn, 'fake_tweets.csv', checkpoint='fake_state.json', workers=4)
+scheduler.run(airline_jobs, report=print, report_every=5)
+
+faketweets = read_tweets('fake_tweets.csv')
@@ -0,0 +1,391 @@
+#############################################
+#==============Tweet Collector==============#
+# Page through user timelines and searches  #
+# with max_id / since_id, stay inside the   #
+# rate limits, remember where each job      #
+# stopped, and append the tweets to a file  #
+# laid out like tweets.csv.                 #
+#############################################
+
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Needs the text-mining assets folder on
+# sys.path
+from tweet_loader import CREATED_FORMAT, TWEET_COLUMNS
+
+# Calls allowed per 15 minute window with user
+# authentication, and the tweets per page
+DEFAULT_LIMITS = {'timeline': 900, 'search': 180}
+PAGE_SIZE = {'timeline': 200, 'search': 100}
+WINDOW = 15 * 60
+
+# Resource paths python-twitter tracks the
+# rate limit headers under
+ENDPOINT_PATHS = {'timeline': 'statuses/user_timeline.json',
+                  'search': 'search/tweets.json'}
+
+# created_at as the API sends it, e.g.
+# Wed Oct 10 20:19:24 +0000 2018
+TWITTER_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+
+def _field(obj, name):
+    # twitter.Status objects or plain dicts
+    # (AsDict() or the raw JSON)
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+#==============================================
+# One tweet as a row of tweets.csv; the
+# sentiment columns are left empty
+#==============================================
+def status_to_row(status, airline=None):
+    user = _field(status, 'user')
+    created = _field(status, 'created_at')
+    if created:
+        created = datetime.strptime(created, TWITTER_FORMAT).strftime(CREATED_FORMAT)
+    coord = None
+    point = _field(status, 'coordinates')
+    if point and _field(point, 'coordinates'):
+        # GeoJSON is [longitude, latitude]
+        lon, lat = _field(point, 'coordinates')[:2]
+        coord = '[%s, %s]' % (lat, lon)
+    row = dict.fromkeys(TWEET_COLUMNS, '')
+    row.update({'tweet_id': _field(status, 'id'),
+                'airline': airline or '',
+                'name': _field(user, 'screen_name') or '',
+                'retweet_count': _field(status, 'retweet_count') or 0,
+                'text': _field(status, 'full_text') or _field(status, 'text') or '',
+                'tweet_coord': coord or '',
+                'tweet_created': created or '',
+                'tweet_location': _field(user, 'location') or '',
+                'user_timezone': _field(user, 'time_zone') or ''})
+    return row
+
+
+class TweetWriter:
+    """Appends rows to a CSV file with the columns of tweets.csv.
+
+    Rows are buffered and written `batch_size` at a time. The ids
+    already in the file are read when it is opened, so a tweet that is
+    collected twice (overlapping searches, or a page fetched again
+    after an interrupted run) is only written once.
+    """
+
+    def __init__(self, path='tweets.csv', batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        self.seen = set()
+        self.written = 0
+        self.lock = threading.RLock()
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    self.seen.add(int(row['tweet_id']))
+
+    # Returns True when the buffer was written
+    def add(self, rows):
+        with self.lock:
+            for row in rows:
+                if row['tweet_id'] not in self.seen:
+                    self.seen.add(row['tweet_id'])
+                    self.rows.append(row)
+            if len(self.rows) >= self.batch_size:
+                self.flush()
+                return True
+            return False
+
+    def flush(self):
+        with self.lock:
+            if not self.rows:
+                return
+            new_file = not os.path.exists(self.path) or not os.path.getsize(self.path)
+            with open(self.path, 'a', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=TWEET_COLUMNS, lineterminator='\n')
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(self.rows)
+            self.written += len(self.rows)
+            self.rows = []
+
+
+class RateWindow:
+    """At most `limit` calls in any `window` seconds.
+
+    `wait()` sleeps until the next call is allowed and records it.
+    When the API reports its own count, `update()` blocks the endpoint
+    until the reset time once nothing is left, and `block()` does the
+    same after a rate limit error.
+    """
+
+    def __init__(self, limit, window=WINDOW, clock=time.time, sleep=time.sleep):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        self.calls = deque()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    # Seconds until a call is allowed
+    def delay(self):
+        now = self.clock()
+        while self.calls and self.calls[0] <= now - self.window:
+            self.calls.popleft()
+        until = self.blocked_until
+        if len(self.calls) >= self.limit:
+            until = max(until, self.calls[0] + self.window)
+        return max(0.0, until - now)
+
+    def wait(self):
+        with self.lock:
+            waited = 0.0
+            pause = self.delay()
+            while pause > 0:
+                self.sleep(pause)
+                waited += pause
+                pause = self.delay()
+            self.calls.append(self.clock())
+            return waited
+
+    def update(self, remaining, reset):
+        if remaining is not None and remaining <= 0 and reset:
+            self.blocked_until = max(self.blocked_until, float(reset))
+
+    def block(self, seconds=None):
+        self.blocked_until = self.clock() + (seconds or self.window)
+
+
+def _rate_limited(exc):
+    # TwitterError carries the API's error list,
+    # e.g. [{'code': 88, 'message': 'Rate limit exceeded'}]
+    message = exc.args[0] if exc.args else None
+    if isinstance(message, list):
+        return any(_field(m, 'code') == 88 for m in message)
+    return 'rate limit' in str(exc).lower()
+
+
+class Job:
+    """One timeline (`target` is a screen name) or one search (`target`
+    is a term, or a raw query copied from the browser starting with
+    'q='). `airline` fills the airline column; `params` go to the API
+    call, e.g. include_rts=False."""
+
+    def __init__(self, endpoint, target, airline=None, max_pages=None, **params):
+        if endpoint not in DEFAULT_LIMITS:
+            raise ValueError("endpoint must be 'timeline' or 'search', not %r" % endpoint)
+        self.endpoint = endpoint
+        self.target = target
+        self.airline = airline
+        self.max_pages = max_pages
+        self.params = params
+
+    @property
+    def key(self):
+        return '%s:%s' % (self.endpoint, self.target)
+
+    def __repr__(self):
+        return '<Job %s>' % self.key
+
+
+class TweetCollector:
+    """Collect every available tweet of a list of jobs.
+
+    Each job pages backwards from the newest tweet with max_id until a
+    page comes back empty; the newest id then becomes its since_id, so
+    the next run only asks for tweets posted since. The cursors are
+    kept in the JSON file `checkpoint`, saved whenever a batch of rows
+    has been written, so an interrupted run picks up where it stopped.
+
+    `run()` takes turns between the jobs page by page, preferring jobs
+    whose endpoint still has calls left in its rate window. The limits
+    are DEFAULT_LIMITS unless given in `limits`; when the api object
+    tracks the rate limit headers (python-twitter's `api.rate_limit`)
+    those are obeyed as well. `api` is a twitter.Api or any object with
+    the same GetUserTimeline and GetSearch methods.
+    """
+
+    def __init__(self, api, writer, checkpoint='collector_state.json', limits=None,
+                 window=WINDOW, clock=time.time, sleep=time.sleep):
+        self.api = api
+        self.writer = writer if isinstance(writer, TweetWriter) else TweetWriter(writer)
+        self.checkpoint = checkpoint
+        self.clock = clock
+        self.sleep = sleep
+        limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.windows = {name: RateWindow(limit, window, clock, sleep) for name, limit in limits.items()}
+        self.state = {}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint, encoding='utf-8') as f:
+                self.state = json.load(f)
+        self.stats = {'calls': 0, 'tweets': 0, 'rate_limited': 0, 'waited': 0.0}
+        self._lock = threading.RLock()
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _save(self):
+        if not self.checkpoint:
+            return
+        with self._lock:
+            tmp = self.checkpoint + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=1)
+            os.replace(tmp, self.checkpoint)
+
+    #==========================================
+    # Follow the api's own count of the calls
+    # left, if it keeps one
+    #==========================================
+    def _sync_limit(self, endpoint):
+        rate_limit = getattr(self.api, 'rate_limit', None)
+        if rate_limit is None or not hasattr(rate_limit, 'get_limit'):
+            return
+        url = '%s/%s' % (getattr(self.api, 'base_url', ''), ENDPOINT_PATHS[endpoint])
+        limit = rate_limit.get_limit(url)
+        self.windows[endpoint].update(_field(limit, 'remaining'), _field(limit, 'reset'))
+
+    def _request(self, job, since_id, max_id):
+        params = dict(job.params)
+        params.setdefault('count', PAGE_SIZE[job.endpoint])
+        if job.endpoint == 'timeline':
+            return self.api.GetUserTimeline(screen_name=job.target, since_id=since_id,
+                                            max_id=max_id, **params)
+        if not job.target.startswith('q='):
+            params.setdefault('result_type', 'recent')
+            return self.api.GetSearch(term=job.target, since_id=since_id, max_id=max_id, **params)
+        # python-twitter ignores the other arguments
+        # when given a raw query, so the cursors go
+        # into the query string
+        query = job.target
+        for name, value in sorted(params.items()):
+            query += '&%s=%s' % (name, value)
+        if since_id is not None:
+            query += '&since_id=%d' % since_id
+        if max_id is not None:
+            query += '&max_id=%d' % max_id
+        return self.api.GetSearch(raw_query=query)
+
+    #==========================================
+    # One page of a job, waiting for the rate
+    # window and retrying after a rate limit
+    # error
+    #==========================================
+    def _call(self, job, since_id, max_id):
+        window = self.windows[job.endpoint]
+        while True:
+            self._count('waited', window.wait())
+            self._count('calls')
+            try:
+                statuses = self._request(job, since_id, max_id)
+            except Exception as exc:
+                if not _rate_limited(exc):
+                    raise
+                self._count('rate_limited')
+                window.block()
+                self._sync_limit(job.endpoint)
+                continue
+            self._sync_limit(job.endpoint)
+            return statuses
+
+    def _job_state(self, job):
+        with self._lock:
+            return self.state.setdefault(job.key, {'since_id': None, 'max_id': None, 'newest': None,
+                                                   'tweets': 0, 'completed': None})
+
+    #==========================================
+    # Write one page of a job and move its
+    # cursor; returns the number of tweets, or
+    # None when the job has reached the end
+    #==========================================
+    def _advance(self, job, statuses):
+        state = self._job_state(job)
+        ids = [_field(s, 'id') for s in statuses]
+        page = [(i, s) for i, s in zip(ids, statuses)
+                if (state['max_id'] is None or i <= state['max_id'])
+                and (state['since_id'] is None or i > state['since_id'])]
+        rows = [status_to_row(s, job.airline) for _, s in page]
+        with self._lock:
+            if not page:
+                # Back at since_id, or at the oldest tweet
+                # the API serves: next time, start from the
+                # newest tweet of this pass
+                if state['newest'] is not None:
+                    state['since_id'] = max(state['since_id'] or 0, state['newest'])
+                state['max_id'] = state['newest'] = None
+                state['completed'] = self.clock()
+                self.writer.flush()
+                self._save()
+                return None
+            ids = [i for i, _ in page]
+            state['newest'] = max(state['newest'] or 0, max(ids))
+            state['max_id'] = min(ids) - 1
+            state['tweets'] += len(page)
+            self.stats['tweets'] += len(page)
+            if self.writer.add(rows):
+                self._save()
+        return len(page)
+
+    #==========================================
+    # Page through one job; yields after every
+    # page so run() can switch between jobs
+    #==========================================
+    def _pages(self, job):
+        state = self._job_state(job)
+        pages = 0
+        while job.max_pages is None or pages < job.max_pages:
+            statuses = self._call(job, state['since_id'], state['max_id'])
+            pages += 1
+            found = self._advance(job, statuses)
+            if found is None:
+                return
+            yield found
+        # Stopped by max_pages; max_id is kept so the
+        # next run carries on further back
+        self.writer.flush()
+        self._save()
+
+    #==========================================
+    # Run the jobs to the end (or max_pages);
+    # returns the tweets collected per job
+    #==========================================
+    def run(self, jobs):
+        counts = {job.key: 0 for job in jobs}
+        active = deque((job, self._pages(job)) for job in jobs)
+        try:
+            while active:
+                # The first job that can call right away,
+                # else the one whose window opens first
+                delays = [self.windows[job.endpoint].delay() for job, _ in active]
+                turn = delays.index(min(delays))
+                active.rotate(-turn)
+                job, pages = active.popleft()
+                try:
+                    counts[job.key] += next(pages)
+                except StopIteration:
+                    continue
+                active.append((job, pages))
+        finally:
+            # Whatever is buffered is on disk before the
+            # cursors that point past it
+            self.writer.flush()
+            self._save()
+        return counts
+
+    def timeline(self, screen_name, airline=None, max_pages=None, **params):
+        return self.run([Job('timeline', screen_name, airline, max_pages, **params)])
+
+    def search(self, query, airline=None, max_pages=None, **params):
+        return self.run([Job('search', query, airline, max_pages, **params)])
@@ -0,0 +1,102 @@
+#############################################
+#===========Cleaned Corpus Cache============#
+# Save the cleaned and stemmed tweets as a  #
+# Parquet (or Feather) file so later        #
+# tutorials can load them in one step.      #
+#############################################
+
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from tweet_loader import read_tweets
+
+
+#==========================================
+# SHA-256 of a file, read in 1 MB blocks
+#==========================================
+def file_digest(path, blocksize=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+#==========================================
+# Key for a cached corpus: changes whenever
+# the input file or any of the settings
+# (stop words, stemmer, ...) change
+#==========================================
+def cache_key(path, *configs):
+    digest = hashlib.sha256(file_digest(path).encode())
+    digest.update(json.dumps(configs, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+class CorpusCache:
+    """Directory of cleaned corpora, one file per cache key.
+
+    Files are named `<source>-<key>.<fmt>`; saving a new version for a
+    source removes the older ones, so a stale corpus is never loaded.
+    `fmt` is 'parquet' or 'feather' (both need pyarrow).
+    """
+
+    def __init__(self, cache_dir='cache', fmt='parquet'):
+        if fmt not in ('parquet', 'feather'):
+            raise ValueError("fmt must be 'parquet' or 'feather', not %r" % fmt)
+        self.cache_dir = cache_dir
+        self.fmt = fmt
+
+    def path(self, source, key):
+        name = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.cache_dir, '%s-%s.%s' % (name, key, self.fmt))
+
+    def load(self, source, key):
+        path = self.path(source, key)
+        if not os.path.exists(path):
+            return None
+        if self.fmt == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_feather(path)
+
+    def save(self, source, key, frame):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(source, key)
+        # Write to a temporary name first so an
+        # interrupted run never leaves half a file
+        tmp = path + '.tmp'
+        if self.fmt == 'parquet':
+            frame.to_parquet(tmp)
+        else:
+            # Feather cannot store an index
+            frame.reset_index(drop=True).to_feather(tmp)
+        os.replace(tmp, path)
+        self.remove_stale(source, key)
+        return path
+
+    def remove_stale(self, source, key):
+        keep = self.path(source, key)
+        pattern = self.path(source, '*')
+        for old in glob.glob(pattern):
+            if old != keep:
+                os.remove(old)
+
+
+#==============================================
+# Read, clean and stem tweets.csv, or load the
+# result from the cache if nothing changed
+#==============================================
+def prepare_corpus(path, cleaner, stemmer, cache=None):
+    cache = cache or CorpusCache()
+    key = cache_key(path, cleaner.config(), stemmer.config())
+    tweets_data = cache.load(path, key)
+    if tweets_data is not None:
+        return tweets_data
+    tweets_data = read_tweets(path)
+    tweets_data['tweettext'] = stemmer.stem_column(cleaner.clean_column(tweets_data['tweettext']))
+    cache.save(path, key, tweets_data)
+    return tweets_data
@@ -0,0 +1,169 @@
+#############################################
+#=========Incremental Tweet Corpus==========#
+# Clean, stem (and optionally tag) only the #
+# tweets that have not been processed yet,  #
+# and keep term counts up to date.          #
+#############################################
+
+import glob
+import json
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from tweet_loader import concat_tweets
+
+# Vectorizer settings that decide how a tweet
+# is split into terms
+TOKEN_PARAMS = ('analyzer', 'lowercase', 'ngram_range', 'stop_words', 'strip_accents', 'token_pattern')
+
+
+class IncrementalCorpus:
+    """Processed tweets kept in `store_dir` as numbered Parquet parts.
+
+    `update()` takes a DataFrame of tweets (e.g. from `read_tweets()`),
+    skips every `tweet_id` already stored, processes the rest and
+    writes them as a new part. Alongside the parts the store keeps the
+    sorted array of seen ids and the document frequency of every term,
+    so a nightly run costs time in proportion to the new tweets only.
+
+    Terms are counted with the analyzer of `vectorizer` (a default
+    CountVectorizer unless given), so the counts match those of that
+    vectorizer fit on all of the tweets at once; `recount()` checks it.
+
+    `ner`, if given, is called with the cleaned text column and must
+    return a DataFrame with one row per tweet in the same order, e.g.
+    `NERPool.frame`; its columns are added to the new rows.
+    """
+
+    def __init__(self, store_dir, cleaner, stemmer, ner=None, vectorizer=None):
+        self.store_dir = store_dir
+        self.cleaner = cleaner
+        self.stemmer = stemmer
+        self.ner = ner
+        vectorizer = vectorizer or CountVectorizer()
+        self.analyzer = vectorizer.build_analyzer()
+        params = vectorizer.get_params()
+        self.config = {'cleaner': cleaner.config(), 'stemmer': stemmer.config(),
+                       'tokens': {k: params[k] for k in TOKEN_PARAMS if k in params}}
+        os.makedirs(store_dir, exist_ok=True)
+        self._load_state()
+
+    def _file(self, name):
+        return os.path.join(self.store_dir, name)
+
+    #==========================================
+    # Read the ids and term counts; refuse to
+    # mix tweets cleaned with other settings
+    #==========================================
+    def _load_state(self):
+        state_file = self._file('state.json')
+        if os.path.exists(state_file):
+            with open(state_file, encoding='utf-8') as f:
+                state = json.load(f)
+            if state['config'] != json.loads(json.dumps(self.config)):
+                raise ValueError('%s was built with different cleaning or stemming settings; '
+                                 'use a new store_dir' % self.store_dir)
+            self.parts = state['parts']
+            self.n_docs = state['n_docs']
+            self.doc_freq = Counter(state['doc_freq'])
+            self.ids = np.load(self._file('ids.npy'))
+        else:
+            self.parts = 0
+            self.n_docs = 0
+            self.doc_freq = Counter()
+            self.ids = np.empty(0, dtype='int64')
+
+    def _save_state(self):
+        np.save(self._file('ids.npy'), self.ids)
+        tmp = self._file('state.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'config': self.config, 'parts': self.parts,
+                       'n_docs': self.n_docs, 'doc_freq': self.doc_freq}, f)
+        os.replace(tmp, self._file('state.json'))
+
+    #==========================================
+    # Tweets whose tweet_id was not seen before
+    #==========================================
+    def unseen(self, tweets):
+        tweets = tweets.drop_duplicates('tweet_id')
+        return tweets[~np.isin(tweets['tweet_id'].to_numpy(), self.ids)]
+
+    #==========================================
+    # Process and store the unseen tweets;
+    # returns the newly processed rows
+    #==========================================
+    def update(self, tweets):
+        new = self.unseen(tweets).copy()
+        if new.empty:
+            return new
+        new['tweettext'] = self.stemmer.stem_column(self.cleaner.clean_column(new['tweettext']))
+        if self.ner is not None:
+            ner = self.ner(new['tweettext'])
+            new[list(ner.columns)] = ner.to_numpy()
+
+        self.parts += 1
+        new.to_parquet(self._file('part-%05d.parquet' % self.parts))
+
+        for doc in new['tweettext']:
+            self.doc_freq.update(set(self.analyzer(doc)))
+        self.n_docs += len(new)
+        self.ids = np.union1d(self.ids, new['tweet_id'].to_numpy())
+        self._save_state()
+        return new
+
+    def __len__(self):
+        return self.n_docs
+
+    def __contains__(self, tweet_id):
+        i = np.searchsorted(self.ids, tweet_id)
+        return i < len(self.ids) and self.ids[i] == tweet_id
+
+    #==========================================
+    # All processed tweets as one DataFrame
+    #==========================================
+    def load(self, columns=None):
+        files = sorted(glob.glob(self._file('part-*.parquet')))
+        if not files:
+            return None
+        return concat_tweets(pd.read_parquet(f, columns=columns) for f in files)
+
+    #==========================================
+    # Number of tweets containing each term
+    #==========================================
+    def document_frequency(self, min_df=1):
+        df = pd.Series(self.doc_freq, dtype='int64').sort_values(ascending=False)
+        return df[df >= min_df]
+
+    #==========================================
+    # Document frequencies counted again from
+    # every stored tweet; equal to doc_freq
+    # unless the store was changed by hand
+    #==========================================
+    def recount(self):
+        doc_freq = Counter()
+        tweets = self.load(columns=['tweettext'])
+        for doc in [] if tweets is None else tweets['tweettext']:
+            doc_freq.update(set(self.analyzer(doc)))
+        return doc_freq
+
+    #==========================================
+    # Smoothed IDF, same formula as sklearn's
+    # TfidfVectorizer(smooth_idf=True)
+    #==========================================
+    def idf(self, min_df=1):
+        df = self.document_frequency(min_df)
+        return np.log((1 + self.n_docs) / (1 + df)) + 1
+
+    #==========================================
+    # Fixed vocabulary for CountVectorizer or
+    # TfidfVectorizer with the same token
+    # settings, so no refit is needed:
+    # CountVectorizer(vocabulary=...)
+    #==========================================
+    def vocabulary(self, min_df=1):
+        terms = sorted(self.document_frequency(min_df).index)
+        return {t: i for i, t in enumerate(terms)}
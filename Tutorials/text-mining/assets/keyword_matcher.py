@@ -0,0 +1,157 @@
+#############################################
+#==========Multi-List Keyword Matcher=======#
+# Find the words and phrases of many        #
+# keyword lists in a tweet with one pass    #
+# over its words (Aho-Corasick on tokens).  #
+#############################################
+
+import re
+from collections import deque
+
+import pandas as pd
+
+
+class KeywordMatcher:
+    """One automaton over the keywords of every list.
+
+    Keywords can be single words ('delayed', 'jfk') or phrases
+    ('missed connection'); they are split into tokens the same way as
+    the tweets. Each token of a tweet costs one dictionary lookup (plus
+    an occasional jump back along a failure link), whatever the number
+    of keywords, so adding thousands of keywords does not slow the scan.
+    """
+
+    def __init__(self, lists=None, lowercase=True, token_pattern=r"\w+"):
+        self.lowercase = lowercase
+        self.token_pattern = re.compile(token_pattern)
+        self.list_names = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]
+        self._out = [[]]
+        self._built = True
+        for name, keywords in (lists or {}).items():
+            self.add(name, keywords)
+
+    def tokens(self, text):
+        if self.lowercase:
+            text = text.lower()
+        return self.token_pattern.findall(text)
+
+    #==========================================
+    # Add the keywords of one list to the trie
+    #==========================================
+    def add(self, name, keywords):
+        if name not in self.list_names:
+            self.list_names.append(name)
+        for keyword in keywords:
+            tokens = self.tokens(keyword)
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                nxt = self._goto[node].get(token)
+                if nxt is None:
+                    nxt = self._goto[node][token] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._own.append([])
+                node = nxt
+            hit = (name, ' '.join(tokens), len(tokens))
+            if hit not in self._own[node]:
+                self._own[node].append(hit)
+        self._built = False
+        return self
+
+    #==========================================
+    # Failure links, breadth first: where to
+    # continue when the next token does not
+    # extend the current partial match
+    #==========================================
+    def build(self):
+        goto, fail = self._goto, self._fail
+        out = self._out = [list(hits) for hits in self._own]
+        queue = deque(goto[0].values())
+        for child in queue:
+            fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for token, child in goto[node].items():
+                f = fail[node]
+                while f and token not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(token, 0)
+                # Keywords ending at the failure node
+                # (suffixes of this one) also end here
+                out[child] += out[fail[child]]
+                queue.append(child)
+        self._built = True
+        return self
+
+    #==========================================
+    # Every keyword found in a list of tokens:
+    # (list name, keyword, first token, end)
+    #==========================================
+    def scan_tokens(self, tokens):
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found = []
+        for i, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for name, keyword, length in out[node]:
+                found.append((name, keyword, i + 1 - length, i + 1))
+        return found
+
+    def scan(self, text):
+        return self.scan_tokens(self.tokens(text))
+
+    # Keywords found per list, e.g.
+    # {'delay': ['delayed'], 'airport': ['jfk']}
+    def hits(self, text):
+        result = {name: [] for name in self.list_names}
+        for name, keyword, _, _ in self.scan(text):
+            result[name].append(keyword)
+        return result
+
+    #==========================================
+    # The tweet without the matched words, for
+    # the given lists (default: all lists)
+    #==========================================
+    def remove(self, text, lists=None):
+        tokens = self.tokens(text)
+        keep = [True] * len(tokens)
+        for name, _, start, end in self.scan_tokens(tokens):
+            if lists is None or name in lists:
+                keep[start:end] = [False] * (end - start)
+        return ' '.join([t for t, k in zip(tokens, keep) if k])
+
+    #==========================================
+    # Number of hits of every list for every
+    # tweet in a pandas column; one column per
+    # keyword list, same index as the tweets
+    #==========================================
+    def count_column(self, column):
+        position = {name: i for i, name in enumerate(self.list_names)}
+        rows = []
+        for text in column.tolist():
+            counts = [0] * len(self.list_names)
+            if isinstance(text, str):
+                for name, _, _, _ in self.scan(text):
+                    counts[position[name]] += 1
+            rows.append(counts)
+        return pd.DataFrame(rows, index=column.index, columns=self.list_names, dtype='int64')
+
+    # The keywords of one list found in each tweet,
+    # joined with spaces (like the NER columns)
+    def keywords_column(self, column, name):
+        return pd.Series([' '.join([kw for lst, kw, _, _ in self.scan(text) if lst == name])
+                          if isinstance(text, str) else '' for text in column.tolist()],
+                         index=column.index, name=name)
+
+    def remove_column(self, column, lists=None):
+        return pd.Series([self.remove(text, lists) if isinstance(text, str) else '' for text in column.tolist()],
+                         index=column.index, name=column.name)
@@ -0,0 +1,92 @@
+#############################################
+#========Sparse Document-Term Matrix========#
+# Keep the document-term matrix as a scipy  #
+# CSR matrix instead of calling toarray().  #
+#############################################
+
+import numpy as np
+import pandas as pd
+
+
+#=============================================
+# Vocabulary as a NumPy array; sklearn renamed
+# get_feature_names() to get_feature_names_out()
+#=============================================
+def feature_names(vectorizer):
+    if hasattr(vectorizer, 'get_feature_names_out'):
+        return np.asarray(vectorizer.get_feature_names_out(), dtype=object)
+    return np.asarray(vectorizer.get_feature_names(), dtype=object)
+
+
+class SparseDTM:
+    """A CSR document-term matrix together with its vocabulary.
+
+    Rows line up with `index` (the index of the tweets DataFrame),
+    columns with `terms`. Nothing is ever densified except the
+    single columns that a query asks for.
+    """
+
+    def __init__(self, matrix, terms, index=None):
+        self.matrix = matrix.tocsr()
+        self.terms = np.asarray(terms, dtype=object)
+        self.term_index = {t: i for i, t in enumerate(self.terms)}
+        if index is None:
+            index = pd.RangeIndex(self.matrix.shape[0])
+        self.index = index
+        self._csc = None
+
+    @classmethod
+    def from_texts(cls, vectorizer, texts):
+        matrix = vectorizer.fit_transform(texts)
+        index = texts.index if hasattr(texts, 'index') else None
+        return cls(matrix, feature_names(vectorizer), index)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    # Column lookups are much cheaper on a CSC copy,
+    # which is built once on first use
+    @property
+    def csc(self):
+        if self._csc is None:
+            self._csc = self.matrix.tocsc()
+        return self._csc
+
+    #=====================================
+    # Counts of one term for every tweet
+    # that contains it, as a Series
+    #=====================================
+    def term(self, term):
+        col = self.term_index[term]
+        csc = self.csc
+        start, end = csc.indptr[col], csc.indptr[col + 1]
+        return pd.Series(csc.data[start:end], index=self.index[csc.indices[start:end]], name=term)
+
+    #=========================================
+    # Tweets that mention a term more than
+    # `more_than` times, e.g. delay > 1
+    #=========================================
+    def mentions(self, term, more_than=0):
+        counts = self.term(term)
+        return counts[counts > more_than]
+
+    #=========================================
+    # Total count of every term over all the
+    # tweets, sorted from most to least used
+    #=========================================
+    def term_totals(self):
+        totals = np.asarray(self.matrix.sum(axis=0)).ravel()
+        return pd.Series(totals, index=self.terms).sort_values(ascending=False)
+
+    def columns(self, terms):
+        cols = [self.term_index[t] for t in terms]
+        return SparseDTM(self.csc[:, cols].tocsr(), terms, self.index)
+
+    #=========================================
+    # DataFrame view backed by sparse columns
+    # for interactive queries, e.g.
+    # frame[frame.delay > 1]
+    #=========================================
+    def to_frame(self):
+        return pd.DataFrame.sparse.from_spmatrix(self.matrix, index=self.index, columns=self.terms)
@@ -0,0 +1,101 @@
+#############################################
+#==============Stemming Cache===============#
+# Wrap an nltk stemmer or lemmatizer with a #
+# bounded LRU cache that can be saved to    #
+# disk and shared between tutorials.        #
+#############################################
+
+import json
+import os
+from collections import OrderedDict
+
+
+class CachedStemmer:
+    """Memoize `PorterStemmer`, `LancasterStemmer` or `WordNetLemmatizer`.
+
+    Tweets repeat the same few thousand words over and over, so most
+    calls are answered from the cache. `hits` and `misses` count the
+    lookups; `maxsize=None` keeps every word ever seen.
+    """
+
+    def __init__(self, stemmer, maxsize=100000, cache_file=None):
+        self.stemmer = stemmer
+        self.maxsize = maxsize
+        self.cache_file = cache_file
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        # Stemmers expose stem(); the lemmatizer
+        # exposes lemmatize() instead
+        if hasattr(stemmer, 'stem'):
+            self._stem = stemmer.stem
+        else:
+            self._stem = stemmer.lemmatize
+        if cache_file is not None and os.path.exists(cache_file):
+            self.load(cache_file)
+
+    #==============================
+    # Stem a single word
+    #==============================
+    def stem(self, word):
+        cache = self._cache
+        try:
+            result = cache[word]
+        except KeyError:
+            self.misses += 1
+            result = cache[word] = self._stem(word)
+            if self.maxsize is not None and len(cache) > self.maxsize:
+                cache.popitem(last=False)
+            return result
+        self.hits += 1
+        cache.move_to_end(word)
+        return result
+
+    #===================================
+    # Stem every word in a cleaned tweet
+    #===================================
+    def stem_text(self, text):
+        stem = self.stem
+        return ' '.join([stem(word) for word in text.split()])
+
+    #===================================
+    # Stem a pandas Series of tweets
+    #===================================
+    def stem_column(self, column):
+        return column.apply(self.stem_text)
+
+    def config(self):
+        return {'stemmer': type(self.stemmer).__name__}
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._cache), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    #==========================================
+    # Persist the cache as JSON; the name of
+    # the stemmer class is stored with it so
+    # a Porter cache is never loaded into a
+    # Lancaster stemmer
+    #==========================================
+    def save(self, path=None):
+        path = path or self.cache_file
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stemmer': type(self.stemmer).__name__,
+                       'words': self._cache}, f)
+
+    def load(self, path=None):
+        path = path or self.cache_file
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('stemmer') != type(self.stemmer).__name__:
+            raise ValueError('%s holds a cache for %s, not %s'
+                             % (path, saved.get('stemmer'), type(self.stemmer).__name__))
+        self._cache.update(saved['words'])
+        if self.maxsize is not None:
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
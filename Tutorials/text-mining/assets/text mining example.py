@@ -3,9 +3,9 @@
 # Read in the necessary libraries.          #
 #############################################
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 import regex
 
 import nltk
@@ -16,88 +16,195 @@ from nltk.stem import LancasterStemmer, WordNetLemmatizer, PorterStemmer
 
 os.chdir(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\data')
 
+# Helper modules for this tutorial live in the
+# assets folder next to this script
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\text-mining\assets')
+
+from tweet_loader import read_tweets
+from tweet_cleaning import TweetCleaner
+from stem_cache import CachedStemmer
+from corpus_cache import CorpusCache, cache_key, prepare_corpus
+from sparse_dtm import SparseDTM, feature_names
+from incremental_corpus import IncrementalCorpus
+from keyword_matcher import KeywordMatcher
+from tweet_store import TweetStore
+
 
 #################################################
 #================Tutorial Data==================#
 # Using airline data from Tiwtter               #
 #################################################
 
-tweets_data = pd.read_csv('tweets.csv')
+# read_tweets() reads the file with compact column
+# types (categories for airline and sentiment,
+# dates for tweet_created) and renames the
+# column text to tweettext
+tweets_data = read_tweets('tweets.csv')
 tweets_data.columns
-
-tweets_data.rename(columns={'text': 'tweettext'}, inplace=True)
+tweets_data.dtypes
+
+tweets_data.memory_usage(deep=True).sum()
+
+# For files too large to read at once, process
+# the tweets in chunks instead, e.g.
+#
+# for chunk in read_tweets('tweets.csv', chunksize=5000):
+#     chunk['tweettext'] = cleaner.clean_column(chunk['tweettext'])
+
+# Collected tweets can also be kept in a tweet
+# store: compressed, each tweet_id stored once,
+# and indexed by id and by date so lookups do
+# not read the whole file
+store = TweetStore('tweet_store')
+store.append_csv('tweets.csv')
+len(store)
+
+570306133677760513 in store
+store.get([570306133677760513, 570301130888122368])
+store.between('2015-02-20', '2015-02-21', airline='United')
+store.airline('Virgin America')
+
+# Same columns and types as read_tweets(), each
+# tweet_id once; the rest of the tutorial keeps
+# the tweets.csv frame, because the cached corpus
+# below is keyed on that file
+stored_tweets = store.to_frame()
+len(stored_tweets)
 
 #==========================================
-# Adjust the case of the text so that all
-# values are lowercase
+# Clean the text in a single pass:
+# lowercase, remove numerical values and
+# punctuation, then remove the stop words
+# (from the nltk library) and the airline
+# names; see tweet_cleaning.py for the
+# patterns used
 #==========================================
-tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join(x.lower() for x in x.split()))
+stop = stopwords.words('english')
 
+airline_names = ['americanair','southwestair','jetblue','virginamerica','usairways','united']
+
+# Before cleaning
 tweets_data['tweettext'][2]
+tweets_data['tweettext'][5]
 
-#=========================================
-# Remove the numerical values as well as
-# punctuation from the text.
-#=========================================
-patterndigits = '\\b[0-9]+\\b'
-tweets_data['tweettext'] = tweets_data['tweettext'].str.replace(patterndigits,'')
+#==========================================
+# Tag the raw tweets with keyword lists.
+# All lists are combined into one matcher
+# that reads each tweet once, no matter how
+# many keywords there are; phrases such as
+# 'late flight' are matched as a whole
+#==========================================
+delay_terms = ['delay', 'delayed', 'delays', 'late flight', 'cancelled', 'canceled',
+               'missed connection', 'rebook', 'stuck on the tarmac', 'on hold']
 
-patternpunc = '[^\w\s]'
-tweets_data['tweettext'] = tweets_data['tweettext'].str.replace(patternpunc,'')
+airport_codes = ['atl', 'bos', 'bwi', 'clt', 'dca', 'den', 'dfw', 'dtw', 'ewr', 'iad',
+                 'iah', 'jfk', 'las', 'lax', 'lga', 'mco', 'mia', 'msp', 'ord', 'phl',
+                 'phx', 'sea', 'sfo', 'slc']
 
-tweets_data['tweettext'][2]
-tweets_data['tweettext'][5]
+keywords = KeywordMatcher({'delay': delay_terms,
+                           'airport': airport_codes,
+                           'airline': airline_names})
 
-#=====================================
-# Remove stop words from the data by
-# using the dataset stop_words found
-# in the nltk library
-#=====================================
-stop = stopwords.words('english')
+keywords.hits(tweets_data['tweettext'][5])
 
-# Before removal of stopwords
-tweets_data['tweettext'][2]
-tweets_data['tweettext'][5]
+# Number of hits of each list per tweet
+keyword_counts = keywords.count_column(tweets_data['tweettext'])
+keyword_counts.sum()
 
-tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join(x for x in x.split() if x not in stop))
+# Share of delay complaints per airline
+keyword_counts['delay'].gt(0).groupby(tweets_data['airline']).mean()
 
-# After removal of stopwords
-tweets_data['tweettext'][2]
-tweets_data['tweettext'][5]
+# The delay terms found in each tweet
+keywords.keywords_column(tweets_data['tweettext'], 'delay').head(20)
 
-#=========================================
-# Remove the airline names from the data
-#=========================================
-airline_names = ['americanair','southwestair','jetblue','virginamerica','usairways','united']
+cleaner = TweetCleaner(stopwords=stop, extra_words=airline_names)
 
-tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join(x for x in x.split() if x not in airline_names))
+tweets_data['tweettext'] = cleaner.clean_column(tweets_data['tweettext'])
 
+# After cleaning
 tweets_data['tweettext'][2]
 tweets_data['tweettext'][5]
 
 #======================================
 # Stem the data using PorterStemmer()
 #======================================
-porstem = PorterStemmer()
+# The same words show up in thousands of tweets,
+# so wrap the stemmer in a cache; the cache is
+# saved to disk and reused by the NER tutorial
+porstem = CachedStemmer(PorterStemmer(), cache_file='porter_stems.json')
+
+tweets_data['tweettext'] = porstem.stem_column(tweets_data['tweettext'])
 
-tweets_data['tweettext'] = tweets_data['tweettext'].apply(lambda x: " ".join([porstem.stem(word) for word in x.split()]))
+porstem.info()
+porstem.save()
 
 tweets_data['tweettext'][2]
 tweets_data['tweettext'][5]
 
+#==========================================
+# Save the cleaned tweets so the following
+# tutorials can load them instead of
+# repeating these steps; the cache key
+# changes if tweets.csv, the stop words or
+# the stemmer change
+#==========================================
+corpus_cache = CorpusCache('cache')
+corpus_cache.save('tweets.csv', cache_key('tweets.csv', cleaner.config(), porstem.config()), tweets_data)
+
+# The same steps in one call; this loads the
+# cached file when it is up to date
+tweets_data = prepare_corpus('tweets.csv', cleaner, porstem, corpus_cache)
+
 #================================
 # Create a document-term matrix
 #================================
+# The matrix is mostly zeros, so keep it in
+# sparse form rather than calling toarray()
 from sklearn.feature_extraction.text import CountVectorizer
 vectorizer = CountVectorizer()
 
-tokens_data = pd.DataFrame(vectorizer.fit_transform(tweets_data['tweettext']).toarray(), columns=vectorizer.get_feature_names())
+dtm = SparseDTM.from_texts(vectorizer, tweets_data['tweettext'])
 
-tokens_data.columns
+dtm.shape
 
-# display all column names
-print(tokens_data.columns.tolist())
+# display all terms
+print(dtm.terms.tolist())
 
 # How many tweets mention delay more than once?
+delayproblems = dtm.mentions('delay', more_than=1)
+delayproblems
+
+# A DataFrame view with sparse columns can be
+# queried just like a regular DataFrame
+tokens_data = dtm.to_frame()
+
+tokens_data.columns
+
 delayproblems = tokens_data[(tokens_data.delay>1)]
 delayproblems['delay']
+
+
+#################################################
+#============Incremental Processing=============#
+# New tweets are collected every day (see the   #
+# social media scraping tutorial); process only #
+# the ones not seen before                      #
+#################################################
+corpus = IncrementalCorpus('processed', cleaner, porstem)
+
+# The first run processes every tweet; later runs
+# with a newer tweets.csv only process new ids
+new_tweets = corpus.update(read_tweets('tweets.csv'))
+len(new_tweets)
+len(corpus)
+
+# Document frequencies are kept up to date, so
+# the vocabulary does not have to be refit
+corpus.document_frequency(min_df=4).head(20)
+
+# The running counts equal a count over every
+# stored tweet
+corpus.recount() == corpus.doc_freq
+
+vectorizer2 = CountVectorizer(vocabulary=corpus.vocabulary(min_df=4))
+dtm2 = SparseDTM(vectorizer2.transform(new_tweets['tweettext']), feature_names(vectorizer2), new_tweets.index)
@@ -0,0 +1,83 @@
+#############################################
+#===========Tweet Cleaning Engine===========#
+# Lowercase, strip numbers and punctuation, #
+# and drop stop words and airline names in  #
+# a single pass over each tweet.            #
+#############################################
+
+import re
+
+import pandas as pd
+
+
+# Same patterns as the step-by-step tutorial;
+# both alternatives are deleted in one sub().
+# Uses re, like pandas str.replace(), so that
+# \w treats emoji modifiers the same way.
+patterndigits = r'\b[0-9]+\b'
+patternpunc = r'[^\w\s]'
+
+# Paragraph separator; used to glue a whole column
+# into one string for the batched mode. It counts
+# as whitespace, so the patterns never touch it.
+_SEP = '\u2029'
+
+
+class TweetCleaner:
+    """Compiled version of the text-mining cleaning steps.
+
+    `stopwords` and `extra_words` (e.g. the airline account names)
+    are merged into one frozenset, so each token costs a single
+    hash lookup instead of a scan through a Python list.
+    """
+
+    def __init__(self, stopwords=(), extra_words=(), lowercase=True):
+        self.stopwords = frozenset(stopwords)
+        self.extra_words = frozenset(extra_words)
+        self.lowercase = lowercase
+        self.drop = self.stopwords | self.extra_words
+        self.pattern = re.compile(patterndigits + '|' + patternpunc)
+
+    # Settings that change the output; used as part
+    # of the key of the cached corpus
+    def config(self):
+        return {'pattern': self.pattern.pattern,
+                'lowercase': self.lowercase,
+                'stopwords': sorted(self.stopwords),
+                'extra_words': sorted(self.extra_words)}
+
+    #===================================
+    # Clean one document (one tweet)
+    #===================================
+    def clean(self, text):
+        if self.lowercase:
+            text = text.lower()
+        drop = self.drop
+        return ' '.join([w for w in self.pattern.sub('', text).split() if w not in drop])
+
+    #==========================================
+    # Batched mode: run the regex once over
+    # the whole column, then split it back
+    # into documents; returns a list of str
+    #==========================================
+    def clean_many(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        joined = _SEP.join(texts)
+        # Fall back to one document at a time if
+        # the separator occurs inside a tweet
+        if joined.count(_SEP) != len(texts) - 1:
+            return [self.clean(x) for x in texts]
+        if self.lowercase:
+            joined = joined.lower()
+        drop = self.drop
+        return [' '.join([w for w in doc.split() if w not in drop])
+                for doc in self.pattern.sub('', joined).split(_SEP)]
+
+    #=========================================
+    # Clean a pandas Series (e.g. the column
+    # tweettext) and keep its index
+    #=========================================
+    def clean_column(self, column):
+        return pd.Series(self.clean_many(column.tolist()), index=column.index, name=column.name)
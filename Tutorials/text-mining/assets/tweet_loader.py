@@ -0,0 +1,145 @@
+#############################################
+#===============Tweet Loader================#
+# Read tweets.csv with explicit, compact    #
+# column types, either all at once or in    #
+# chunks.                                   #
+#############################################
+
+import warnings
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype, union_categoricals
+
+
+# Columns of tweets.csv, in file order
+TWEET_COLUMNS = ['tweet_id', 'airline_sentiment', 'airline_sentiment_confidence',
+                 'negativereason', 'negativereason_confidence', 'airline',
+                 'airline_sentiment_gold', 'name', 'negativereason_gold',
+                 'retweet_count', 'text', 'tweet_coord', 'tweet_created',
+                 'tweet_location', 'user_timezone']
+
+# Format of tweet_created, e.g. 2015-02-24 11:35:52 -0800
+CREATED_FORMAT = '%Y-%m-%d %H:%M:%S %z'
+
+SENTIMENTS = CategoricalDtype(['negative', 'neutral', 'positive'])
+
+AIRLINES = CategoricalDtype(['American', 'Delta', 'Southwest', 'United',
+                             'US Airways', 'Virgin America'])
+
+NEGATIVE_REASONS = CategoricalDtype(['Bad Flight', 'Can\'t Tell', 'Cancelled Flight',
+                                     'Customer Service Issue', 'Damaged Luggage',
+                                     'Flight Attendant Complaints', 'Flight Booking Problems',
+                                     'Late Flight', 'longlines', 'Lost Luggage'])
+
+# Columns with a known set of values; see
+# known_categories()
+KNOWN_CATEGORIES = {'airline_sentiment': SENTIMENTS,
+                    'negativereason': NEGATIVE_REASONS,
+                    'airline': AIRLINES,
+                    'airline_sentiment_gold': SENTIMENTS}
+
+# Repetitive columns are read as categories, and
+# those in KNOWN_CATEGORIES then get the known
+# categories so that chunks line up. Free text
+# (name, text, tweet_created) keeps the default
+# string type.
+TWEET_DTYPES = {'tweet_id': 'int64',
+                'airline_sentiment': 'category',
+                'airline_sentiment_confidence': 'float32',
+                'negativereason': 'category',
+                'negativereason_confidence': 'float32',
+                'airline': 'category',
+                'airline_sentiment_gold': 'category',
+                'negativereason_gold': 'category',
+                'retweet_count': 'int32',
+                'tweet_coord': 'category',
+                'tweet_location': 'category',
+                'user_timezone': 'category'}
+
+
+def _dtypes(usecols):
+    if usecols is None:
+        return TWEET_DTYPES
+    return {c: TWEET_DTYPES[c] for c in usecols if c in TWEET_DTYPES}
+
+
+#==========================================
+# Give the KNOWN_CATEGORIES columns their
+# known categories, in order. Values outside
+# the list (e.g. an airline that is not in
+# tweets.csv) are kept as extra categories
+# with a warning, rather than made missing.
+#==========================================
+def known_categories(frame):
+    for col, dtype in KNOWN_CATEGORIES.items():
+        if col not in frame.columns:
+            continue
+        values = frame[col].astype('category')
+        known = list(dtype.categories)
+        extra = sorted(set(values.cat.categories) - set(known))
+        if extra:
+            warnings.warn('%s has values outside the known categories, kept as extra categories: %s'
+                          % (col, extra), stacklevel=2)
+        frame[col] = values.cat.set_categories(known + extra)
+    return frame
+
+
+#==========================================
+# Parse tweet_created, set the known
+# categories and rename text to tweettext,
+# as every tutorial does
+#==========================================
+def _finish(frame, rename):
+    frame = known_categories(frame)
+    if 'tweet_created' in frame.columns:
+        # utc=True lets files mix time zone offsets
+        frame['tweet_created'] = pd.to_datetime(frame['tweet_created'], format=CREATED_FORMAT, utc=True)
+    if rename:
+        frame = frame.rename(columns={'text': 'tweettext'})
+    return frame
+
+
+#==========================================
+# Iterate over tweets.csv in DataFrames of
+# `chunksize` rows; only one chunk of raw
+# text is held in memory at a time
+#==========================================
+def iter_tweets(path='tweets.csv', chunksize=10000, usecols=None, rename=True):
+    reader = pd.read_csv(path, dtype=_dtypes(usecols), usecols=usecols, chunksize=chunksize)
+    for chunk in reader:
+        yield _finish(chunk, rename)
+
+
+#==========================================
+# Read the whole file; with `chunksize` set
+# this returns the iterator from iter_tweets
+#==========================================
+def read_tweets(path='tweets.csv', usecols=None, chunksize=None, rename=True):
+    if chunksize is not None:
+        return iter_tweets(path, chunksize, usecols, rename)
+    frame = pd.read_csv(path, dtype=_dtypes(usecols), usecols=usecols)
+    return _finish(frame, rename)
+
+
+#==========================================
+# Stitch chunks back into one DataFrame;
+# categories learned per chunk are merged
+# instead of falling back to object
+#==========================================
+def concat_tweets(chunks):
+    chunks = list(chunks)
+    frame = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if str(chunks[0][col].dtype) == 'category' and str(frame[col].dtype) != 'category':
+            frame[col] = union_categoricals([c[col] for c in chunks])
+    return frame
+
+
+#==========================================
+# One column of every chunk as a single
+# stream of values, e.g. the tweet text for
+# the cleaning or NER stages
+#==========================================
+def iter_column(chunks, column='tweettext'):
+    for chunk in chunks:
+        yield from chunk[column]
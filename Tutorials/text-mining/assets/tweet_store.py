@@ -0,0 +1,353 @@
+#############################################
+#================Tweet Store================#
+# Keep collected tweets in compressed       #
+# blocks with an index on tweet_id and on   #
+# tweet_created, so duplicates and date or  #
+# airline ranges are found without reading  #
+# the whole file.                           #
+#############################################
+
+import os
+import pickle
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from tweet_loader import AIRLINES, CREATED_FORMAT, TWEET_COLUMNS, TWEET_DTYPES, known_categories
+
+FLOAT_COLUMNS = ('airline_sentiment_confidence', 'negativereason_confidence')
+INT_COLUMNS = ('tweet_id', 'retweet_count')
+
+# Index files, each a .npy array; blocks is
+# written last and decides which rows exist
+INDEX_FILES = ('ids', 'id_rows', 'times', 'time_rows', 'airlines', 'blocks')
+
+
+#==============================================
+# Tweets in any of the usual shapes (a frame
+# from read_tweets() or read_csv(), or the row
+# dicts of the tweet collector) as one list
+# of values per column of tweets.csv
+#==============================================
+def _columns(tweets):
+    frame = tweets if isinstance(tweets, pd.DataFrame) else pd.DataFrame(list(tweets))
+    frame = frame.rename(columns={'tweettext': 'text'})
+    columns = {}
+    for col in TWEET_COLUMNS:
+        if col not in frame.columns:
+            values = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+        else:
+            values = frame[col]
+        if col == 'tweet_created' and pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime(CREATED_FORMAT)
+        if col in FLOAT_COLUMNS or col in INT_COLUMNS:
+            numbers = pd.to_numeric(values.astype(object).replace('', None), errors='coerce')
+            if col in INT_COLUMNS:
+                numbers = numbers.fillna(0).astype('int64')
+            columns[col] = numbers.tolist()
+        else:
+            columns[col] = [None if v is None or v == '' or (isinstance(v, float) and np.isnan(v)) else str(v)
+                            for v in values.astype(object).tolist()]
+    return columns
+
+
+#==============================================
+# Columns back to the frame read_tweets()
+# returns: same types, tweet_created as UTC
+# dates and text renamed to tweettext
+#==============================================
+def _frame(columns, rename=True):
+    frame = known_categories(pd.DataFrame(columns, columns=TWEET_COLUMNS).astype(TWEET_DTYPES))
+    frame['tweet_created'] = pd.to_datetime(frame['tweet_created'], format=CREATED_FORMAT, utc=True)
+    if rename:
+        frame = frame.rename(columns={'text': 'tweettext'})
+    return frame
+
+
+def _seconds(created):
+    # Seconds since 1970 (UTC); missing dates are
+    # left out of the time index
+    times = pd.to_datetime(pd.Series(created, dtype=object), format=CREATED_FORMAT, utc=True)
+    keep = times.notna().to_numpy()
+    seconds = (times[keep] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    return seconds.to_numpy(dtype='int64'), keep
+
+
+def _timestamp(value):
+    # A date string or datetime as seconds (UTC)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize('UTC')
+    return stamp.value // 10 ** 9
+
+
+class TweetStore:
+    """Append-only tweet file with an id index and a time index.
+
+    The tweets go into `folder/tweets.dat` as blocks of up to
+    `block_size` rows, each block a zlib-compressed pickle of its
+    columns. Next to it are .npy arrays: the offset of every block, the
+    sorted tweet ids and sorted creation times (each with the row they
+    belong to), and the airline of every row. Looking up an id or the
+    start and end of a date range is a binary search on those arrays,
+    and only the blocks holding the wanted rows are read and
+    decompressed. With `mmap` the indexes are memory-mapped rather than
+    read into memory.
+
+    `append()` skips tweets whose id is already stored. The blocks are
+    written first and the block list last, after the other indexes;
+    when those do not match the block list on opening, they are built
+    again from the listed blocks, so an interrupted append leaves the
+    store as it was.
+    """
+
+    def __init__(self, folder='tweet_store', block_size=10000, level=6, mmap=True):
+        self.folder = folder
+        self.block_size = block_size
+        self.level = level
+        self.airline_names = list(AIRLINES.categories)
+        os.makedirs(folder, exist_ok=True)
+        self._cached = (None, None)
+        self._load(mmap)
+
+    def _file(self, name):
+        return os.path.join(self.folder, name)
+
+    def _load(self, mmap):
+        if os.path.exists(self._file('blocks.npy')):
+            mode = 'r' if mmap else None
+            for name in INDEX_FILES:
+                setattr(self, name, np.load(self._file(name + '.npy'), mmap_mode=mode))
+        else:
+            # blocks: offset, length, first row, rows
+            self.blocks = np.empty((0, 4), dtype='int64')
+            self.ids = self.id_rows = np.empty(0, dtype='int64')
+            self.times = self.time_rows = np.empty(0, dtype='int64')
+            self.airlines = np.empty(0, dtype='int8')
+        # Index entries and bytes past the last listed
+        # block are left over from an interrupted append
+        n = len(self)
+        if (len(self.ids) != n or len(self.id_rows) != n or len(self.airlines) != n
+                or len(self.times) != len(self.time_rows)
+                or (len(self.time_rows) and int(np.max(self.time_rows)) >= n)):
+            self._rebuild_index()
+        end = int(self.blocks[-1, 0] + self.blocks[-1, 1]) if len(self.blocks) else 0
+        data = self._file('tweets.dat')
+        if not os.path.exists(data) or os.path.getsize(data) != end:
+            with open(data, 'ab') as f:
+                f.truncate(end)
+
+    #==========================================
+    # Index the rows of the listed blocks again,
+    # after an append was cut short
+    #==========================================
+    def _rebuild_index(self):
+        self.blocks = np.array(self.blocks)
+        ids, times, time_rows, airlines = [], [], [], []
+        for b in range(len(self.blocks)):
+            data = self._block(b)
+            first = int(self.blocks[b, 2])
+            ids.append(np.array(data['tweet_id'], dtype='int64'))
+            seconds, dated = _seconds(data['tweet_created'])
+            times.append(seconds)
+            time_rows.append(first + np.flatnonzero(dated))
+            airlines.append(self._airline_codes(data['airline']))
+        ids = np.concatenate([np.empty(0, dtype='int64')] + ids)
+        order = np.argsort(ids, kind='stable')
+        self.ids, self.id_rows = ids[order], order.astype('int64')
+        times = np.concatenate([np.empty(0, dtype='int64')] + times)
+        time_rows = np.concatenate([np.empty(0, dtype='int64')] + time_rows).astype('int64')
+        order = np.argsort(times, kind='stable')
+        self.times, self.time_rows = times[order], time_rows[order]
+        self.airlines = np.concatenate([np.empty(0, dtype='int8')] + airlines)
+        self._cached = (None, None)
+        self._save_index()
+
+    def _save_index(self):
+        for name in INDEX_FILES:
+            # Copy out of the memory map first; a mapped
+            # file cannot be replaced on Windows
+            values = np.array(getattr(self, name))
+            setattr(self, name, values)
+            tmp = self._file(name + '.tmp.npy')
+            np.save(tmp, values)
+            os.replace(tmp, self._file(name + '.npy'))
+
+    def __len__(self):
+        return int(self.blocks[-1, 2] + self.blocks[-1, 3]) if len(self.blocks) else 0
+
+    #==========================================
+    # Which of `tweet_ids` are stored, as a
+    # boolean array; one binary search each
+    #==========================================
+    def contains(self, tweet_ids):
+        tweet_ids = np.asarray(tweet_ids, dtype='int64')
+        pos = np.searchsorted(self.ids, tweet_ids)
+        found = pos < len(self.ids)
+        found[found] = self.ids[pos[found]] == tweet_ids[found]
+        return found
+
+    def __contains__(self, tweet_id):
+        return bool(self.contains([tweet_id])[0])
+
+    #==========================================
+    # Add the tweets not stored yet; returns
+    # the number of new rows
+    #==========================================
+    def append(self, tweets):
+        columns = _columns(tweets)
+        ids = np.array(columns['tweet_id'], dtype='int64')
+        # New ids, first occurrence only
+        _, first = np.unique(ids, return_index=True)
+        keep = np.zeros(len(ids), dtype=bool)
+        keep[first] = True
+        keep &= ~self.contains(ids)
+        if not keep.any():
+            return 0
+        picked = np.flatnonzero(keep)
+        columns = {col: [values[i] for i in picked] for col, values in columns.items()}
+        ids = ids[picked]
+        start, n = len(self), len(picked)
+
+        # Blocks first, at the end of the data file
+        blocks = []
+        offset = int(self.blocks[-1, 0] + self.blocks[-1, 1]) if len(self.blocks) else 0
+        with open(self._file('tweets.dat'), 'ab') as f:
+            for lo in range(0, n, self.block_size):
+                hi = min(n, lo + self.block_size)
+                data = zlib.compress(pickle.dumps({col: values[lo:hi] for col, values in columns.items()},
+                                                  protocol=pickle.HIGHEST_PROTOCOL), self.level)
+                f.write(data)
+                blocks.append((offset, len(data), start + lo, hi - lo))
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Then the indexes; searchsorted + insert
+        # keeps them sorted without a full sort
+        rows = np.arange(start, start + n, dtype='int64')
+        order = np.argsort(ids, kind='stable')
+        pos = np.searchsorted(self.ids, ids[order])
+        self.ids = np.insert(self.ids, pos, ids[order])
+        self.id_rows = np.insert(self.id_rows, pos, rows[order])
+        times, dated = _seconds(columns['tweet_created'])
+        order = np.argsort(times, kind='stable')
+        pos = np.searchsorted(self.times, times[order], side='right')
+        self.times = np.insert(self.times, pos, times[order])
+        self.time_rows = np.insert(self.time_rows, pos, rows[dated][order])
+        self.airlines = np.concatenate([self.airlines, self._airline_codes(columns['airline'])])
+        self.blocks = np.concatenate([self.blocks, np.array(blocks, dtype='int64').reshape(-1, 4)])
+        self._save_index()
+        return n
+
+    #==========================================
+    # Import a CSV file like tweets.csv in
+    # chunks; returns the number of new rows
+    #==========================================
+    def append_csv(self, path, chunksize=50000):
+        added = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype={'tweet_id': 'int64'}):
+            added += self.append(chunk)
+        return added
+
+    def _block(self, i):
+        if self._cached[0] != i:
+            offset, length = int(self.blocks[i, 0]), int(self.blocks[i, 1])
+            with open(self._file('tweets.dat'), 'rb') as f:
+                f.seek(offset)
+                self._cached = (i, pickle.loads(zlib.decompress(f.read(length))))
+        return self._cached[1]
+
+    #==========================================
+    # The given row numbers as a DataFrame,
+    # in the order given; each block needed is
+    # read and decompressed once
+    #==========================================
+    def rows(self, rows, rename=True):
+        rows = np.asarray(rows, dtype='int64')
+        columns = {col: [None] * len(rows) for col in TWEET_COLUMNS}
+        block_of = np.searchsorted(self.blocks[:, 2], rows, side='right') - 1
+        order = np.argsort(block_of, kind='stable')
+        bounds = np.flatnonzero(np.diff(block_of[order])) + 1
+        for group in np.split(order, bounds) if len(rows) else []:
+            b = int(block_of[group[0]])
+            data = self._block(b)
+            local = (rows[group] - self.blocks[b, 2]).tolist()
+            for col in TWEET_COLUMNS:
+                values, out = data[col], columns[col]
+                for j, k in zip(group.tolist(), local):
+                    out[j] = values[k]
+        frame = _frame(columns, rename)
+        frame.index = pd.RangeIndex(len(frame))
+        return frame
+
+    # Stored tweets by id; ids not stored are
+    # skipped
+    def get(self, tweet_ids, rename=True):
+        tweet_ids = np.asarray(tweet_ids, dtype='int64')
+        found = self.contains(tweet_ids)
+        pos = np.searchsorted(self.ids, tweet_ids[found])
+        return self.rows(self.id_rows[pos], rename)
+
+    #==========================================
+    # Tweets created in [start, end), oldest
+    # first, optionally for some airlines only;
+    # start or end may be None (open ended)
+    #==========================================
+    def between(self, start=None, end=None, airline=None, rename=True):
+        lo = np.searchsorted(self.times, _timestamp(start)) if start is not None else 0
+        hi = np.searchsorted(self.times, _timestamp(end)) if end is not None else len(self.times)
+        rows = np.asarray(self.time_rows[lo:hi])
+        if airline is not None:
+            rows = rows[self._airline_mask(airline)[rows]]
+        return self.rows(rows, rename)
+
+    # Position in airline_names, -1 for a missing
+    # airline or one outside the list
+    def _airline_codes(self, names):
+        return pd.Index(self.airline_names).get_indexer(pd.Index(list(names), dtype=object)).astype('int8')
+
+    def _airline_mask(self, airline):
+        names = [airline] if isinstance(airline, str) else list(airline)
+        unknown = set(names) - set(self.airline_names)
+        if unknown:
+            raise ValueError('unknown airline(s) %s; choose from %s' % (sorted(unknown), self.airline_names))
+        return np.isin(self.airlines, [self.airline_names.index(n) for n in names])
+
+    # Every tweet of one or more airlines, in the
+    # order they were stored
+    def airline(self, airline, rename=True):
+        return self.rows(np.flatnonzero(self._airline_mask(airline)), rename)
+
+    #==========================================
+    # The whole store, block by block or as
+    # one frame shaped like read_tweets()
+    #==========================================
+    def iter_frames(self, rename=True):
+        for b in range(len(self.blocks)):
+            first, count = int(self.blocks[b, 2]), int(self.blocks[b, 3])
+            frame = _frame(self._block(b), rename)
+            frame.index = pd.RangeIndex(first, first + count)
+            yield frame
+
+    def to_frame(self, rename=True):
+        if not len(self.blocks):
+            return _frame({col: [] for col in TWEET_COLUMNS}, rename)
+        frame = pd.concat(self.iter_frames(rename))
+        # Categories learned per block are merged
+        # as in concat_tweets()
+        for col, dtype in TWEET_DTYPES.items():
+            if dtype == 'category' and str(frame[col].dtype) != 'category':
+                frame[col] = frame[col].astype('category')
+        return known_categories(frame)
+
+
+#==============================================
+# Build (or update) a store from tweets.csv
+#==============================================
+def store_from_csv(path='tweets.csv', folder='tweet_store', **kwargs):
+    store = TweetStore(folder, **kwargs)
+    store.append_csv(path)
+    return store
+
@@ -0,0 +1,323 @@
+#############################################
+#===========Headless Browser Pool===========#
+# Keep a few headless Firefox windows open  #
+# and reuse them for many pages; pull all   #
+# the fields of a page with one script      #
+# call; skip the browser entirely when the  #
+# page does not need JavaScript.            #
+#############################################
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from lxml import etree
+
+from fetcher import Fetcher
+from xpath_engine import XPathExtractor, parse, table_to_frame
+
+# selenium is only needed for pages that must
+# be rendered by a browser
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+except ImportError:
+    webdriver = None
+    WebDriverException = Exception
+
+# Evaluates every XPath of the spec in the page
+# and returns all results in one round trip;
+# tables come back as HTML and are converted
+# with table_to_frame()
+EXTRACT_JS = """
+var fields = arguments[0], out = {};
+for (var name in fields) {
+    var xpath = fields[name][0], kind = fields[name][1];
+    var found = document.evaluate(xpath, document, null,
+                                  XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    if (kind == 'count') { out[name] = found.snapshotLength; continue; }
+    var values = [];
+    for (var i = 0; i < found.snapshotLength; i++) {
+        var node = found.snapshotItem(i);
+        if (kind == 'table' || kind == 'tables') values.push(node.outerHTML);
+        else values.push(node.nodeType == 1 ? node.innerText : node.nodeValue);
+        if (kind == 'first' || kind == 'table') break;
+    }
+    out[name] = values;
+}
+return out;
+"""
+
+
+#==============================================
+# Returns a function that starts one headless
+# Firefox; works with Selenium 3 and 4.
+# Selenium is only needed once a browser is
+# actually started.
+#==============================================
+def firefox_factory(executable_path=None, headless=True):
+    def start():
+        if webdriver is None:
+            raise ImportError('selenium is needed to start a browser; pip install selenium')
+        options = webdriver.FirefoxOptions()
+        if headless:
+            options.add_argument('-headless')
+        try:
+            from selenium.webdriver.firefox.service import Service
+        except ImportError:
+            # Selenium 3
+            kwargs = {'executable_path': executable_path} if executable_path else {}
+            return webdriver.Firefox(options=options, **kwargs)
+        service = Service(executable_path) if executable_path else Service()
+        return webdriver.Firefox(service=service, options=options)
+    return start
+
+
+def _normalize_spec(spec):
+    return {name: [expr, 'first'] if isinstance(expr, str) else list(expr)
+            for name, expr in spec.items()}
+
+
+#==============================================
+# Turn the script's raw results into the same
+# values XPathExtractor returns
+#==============================================
+def _finish(raw, spec):
+    record = {}
+    for name, (_, kind) in spec.items():
+        values = raw.get(name)
+        if kind == 'count':
+            record[name] = int(values or 0)
+        elif kind == 'first':
+            record[name] = ' '.join(values[0].split()) if values else None
+        elif kind == 'all':
+            record[name] = [' '.join(v.split()) for v in values or []]
+        else:
+            frames = [table_to_frame(parse(v).find('.//table')) for v in values or []]
+            record[name] = (frames[0] if frames else None) if kind == 'table' else frames
+    return record
+
+
+class BrowserPool:
+    """A fixed number of warm browser sessions shared by page jobs.
+
+    The sessions are started together by `start()`, on entering a
+    `with` block, or else by the first job, so a pool that is never
+    needed never opens a browser. `session()` hands them out; a job
+    waits when all of them are busy, for at most `acquire_timeout`
+    seconds if given. A session that fails is replaced, and with
+    `max_pages` each one is restarted after that many pages to keep
+    the browser's memory in check. When a replacement cannot be
+    started the pool shrinks by one, and once no session is left
+    `session()` raises instead of waiting. `factory` is any function
+    returning a webdriver, e.g. `firefox_factory(...)`.
+    """
+
+    def __init__(self, size=2, factory=None, page_timeout=30, max_pages=None, acquire_timeout=None):
+        self.size = size
+        self.factory = factory or firefox_factory()
+        self.page_timeout = page_timeout
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.Queue()
+        self._uses = {}
+        self._live = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self.stats = {'started': 0, 'pages': 0, 'restarted': 0, 'lost': 0}
+
+    def _new_driver(self):
+        driver = self.factory()
+        if hasattr(driver, 'set_page_load_timeout'):
+            driver.set_page_load_timeout(self.page_timeout)
+        with self._lock:
+            self.stats['started'] += 1
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return self
+            # Browsers start in parallel; startup is
+            # the slow part
+            with ThreadPoolExecutor(self.size) as pool:
+                futures = [pool.submit(self._new_driver) for _ in range(self.size)]
+            drivers, error = [], None
+            for future in futures:
+                try:
+                    drivers.append(future.result())
+                except Exception as exc:
+                    error = error or exc
+            if error is not None:
+                # Do not leave the browsers that did start
+                # running in the background
+                for driver in drivers:
+                    self._quit(driver)
+                raise error
+            for driver in drivers:
+                self._idle.put(driver)
+            with self._lock:
+                self._live = len(drivers)
+            self._started = True
+        return self
+
+    # Replace a broken or worn out session; if the
+    # new one fails to start, the slot is given up
+    def _retire(self, driver):
+        self._quit(driver)
+        with self._lock:
+            self.stats['restarted'] += 1
+        try:
+            replacement = self._new_driver()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+                self.stats['lost'] += 1
+            return
+        self._idle.put(replacement)
+
+    def _borrow(self):
+        deadline = None if self.acquire_timeout is None else time.monotonic() + self.acquire_timeout
+        while True:
+            with self._lock:
+                if self._live <= 0:
+                    raise RuntimeError('no browser sessions left; replacements failed to start')
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise TimeoutError('no browser session free after %s seconds' % self.acquire_timeout)
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                # Check again whether any session is left
+                continue
+
+    #==========================================
+    # Borrow a session for one job
+    #==========================================
+    @contextmanager
+    def session(self):
+        if not self._started:
+            self.start()
+        driver = self._borrow()
+        try:
+            yield driver
+        except WebDriverException:
+            # The browser may be broken; start a new one
+            self._retire(driver)
+            raise
+        except BaseException:
+            self._idle.put(driver)
+            raise
+        with self._lock:
+            self._uses[id(driver)] += 1
+            self.stats['pages'] += 1
+            worn_out = self.max_pages is not None and self._uses[id(driver)] >= self.max_pages
+        if worn_out:
+            self._retire(driver)
+        else:
+            self._idle.put(driver)
+
+    #==========================================
+    # Load a page and read every field with a
+    # single script call
+    #==========================================
+    def extract(self, url, spec):
+        spec = _normalize_spec(spec)
+        with self.session() as driver:
+            driver.get(url)
+            raw = driver.execute_script(EXTRACT_JS, spec)
+        return _finish(raw or {}, spec)
+
+    def extract_all(self, urls, spec):
+        with ThreadPoolExecutor(self.size) as pool:
+            return list(pool.map(lambda url: self.extract(url, spec), urls))
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+        with self._lock:
+            self._live = 0
+        self._started = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PageScraper:
+    """Scrape fields from pages, using a browser only when needed.
+
+    With mode='auto' each page is first downloaded with `fetcher` and
+    the spec applied with lxml; only if a `required` field (default:
+    all fields) comes back empty is the page loaded in the browser
+    pool, e.g. because JavaScript builds that part of the page.
+    mode='http' never uses the browser, mode='browser' always does.
+    """
+
+    def __init__(self, pool=None, fetcher=None, mode='auto', required=None):
+        if mode not in ('auto', 'http', 'browser'):
+            raise ValueError("mode must be 'auto', 'http' or 'browser', not %r" % mode)
+        self.pool = pool
+        self.fetcher = fetcher or Fetcher(cache_dir=None)
+        self.mode = mode
+        self.required = required
+        self._extractors = {}
+        self.stats = {'http': 0, 'browser': 0}
+
+    def _extractor(self, spec):
+        key = tuple(sorted((k, str(v)) for k, v in spec.items()))
+        if key not in self._extractors:
+            self._extractors[key] = XPathExtractor(spec)
+        return self._extractors[key]
+
+    def _complete(self, record):
+        for name in self.required or record:
+            value = record.get(name)
+            if value is None or (isinstance(value, (str, list)) and not value):
+                return False
+            # count() in XPath returns a float
+            if isinstance(value, (int, float)) and value == 0:
+                return False
+            if hasattr(value, 'empty') and value.empty:
+                return False
+        return True
+
+    def scrape(self, url, spec):
+        if self.mode != 'browser':
+            page = self.fetcher.fetch(url)
+            if page.ok:
+                try:
+                    record = self._extractor(spec).extract(parse(page.content))
+                except etree.LxmlError:
+                    record = None
+                if record is not None and (self.mode == 'http' or self._complete(record)):
+                    self.stats['http'] += 1
+                    return record
+            if self.mode == 'http':
+                page.raise_for_status()
+        if self.pool is None:
+            raise RuntimeError('%s needs a browser, but no BrowserPool was given' % url)
+        self.stats['browser'] += 1
+        return self.pool.extract(url, spec)
+
+    def scrape_all(self, urls, spec, workers=4):
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(lambda url: self.scrape(url, spec), urls))
@@ -0,0 +1,271 @@
+#############################################
+#===============Page Fetcher================#
+# Download many pages with one shared       #
+# connection pool, a few at a time per      #
+# site, retrying failures, and keep a copy  #
+# on disk so unchanged pages are not        #
+# downloaded again.                         #
+#############################################
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from lxml import html
+from requests.adapters import HTTPAdapter
+
+# Status codes worth trying again
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class Page:
+    """One downloaded page; `from_cache` is True when the body came
+    from the disk cache (the server answered 304 Not Modified, or the
+    copy was younger than `max_age`)."""
+
+    def __init__(self, url, status, content=b'', headers=None, from_cache=False, error=None):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and 200 <= self.status < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    # lxml tree, as html.fromstring(resp.content)
+    def tree(self):
+        return html.fromstring(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError('%s %s' % (self.status, self.error or self.url))
+        return self
+
+    def __repr__(self):
+        return '<Page %s %s%s>' % (self.status, self.url, ' (cached)' if self.from_cache else '')
+
+
+class HttpCache:
+    """Responses on disk, two files per URL: `<key>.body` holds the
+    page and `<key>.json` the status, ETag, Last-Modified and the time
+    it was fetched. The key is the SHA-256 of the URL."""
+
+    def __init__(self, folder='http_cache'):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.folder, key)
+        return base + '.json', base + '.body'
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def put(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta = {'url': url, 'status': response.status_code, 'fetched': time.time(),
+                'headers': {k: response.headers[k] for k in ('ETag', 'Last-Modified', 'Content-Type')
+                            if k in response.headers}}
+        # Body first; the metadata marks the
+        # entry as complete
+        for path, data, mode in ((body_path, response.content, 'wb'),
+                                 (meta_path, json.dumps(meta), 'w')):
+            tmp = path + '.tmp'
+            with open(tmp, mode) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return meta
+
+    # The server confirmed the copy is current
+    def touch(self, url, meta):
+        meta_path, _ = self._paths(url)
+        meta['fetched'] = time.time()
+        tmp = meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(meta))
+        os.replace(tmp, meta_path)
+
+    # Headers that ask the server to send the
+    # page only if it changed
+    @staticmethod
+    def conditional_headers(meta):
+        headers = {}
+        if 'ETag' in meta['headers']:
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if 'Last-Modified' in meta['headers']:
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+
+class _HostGate:
+    """At most `limit` requests in flight to one host, started at
+    least `interval` seconds apart."""
+
+    def __init__(self, limit, interval):
+        self.slots = threading.BoundedSemaphore(limit)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def __enter__(self):
+        self.slots.acquire()
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self.slots.release()
+
+
+class Fetcher:
+    """Thread-pool downloader sharing one `requests.Session`.
+
+    `workers` pages are fetched at once overall, at most `per_host` of
+    them from the same site, with requests to a site spaced `delay`
+    seconds apart. Connection errors and the statuses in RETRY_STATUS
+    are retried `retries` times, waiting backoff * 2**attempt seconds
+    (or the server's Retry-After). With a `cache_dir`, pages are stored
+    on disk and re-requested with If-None-Match / If-Modified-Since;
+    `max_age` (seconds) skips the request entirely for recent copies.
+    """
+
+    def __init__(self, cache_dir='http_cache', workers=8, per_host=2, delay=0.5, retries=3,
+                 backoff=0.5, timeout=30, max_age=None, headers=None):
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_age = max_age
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or {})
+        self._gates = {}
+        self._gates_lock = threading.Lock()
+        self.stats = {'requests': 0, 'downloaded': 0, 'not_modified': 0, 'fresh': 0,
+                      'retries': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _gate(self, url):
+        host = urlsplit(url).netloc
+        with self._gates_lock:
+            if host not in self._gates:
+                self._gates[host] = _HostGate(self.per_host, self.delay)
+            return self._gates[host]
+
+    def _retry_wait(self, attempt, response=None):
+        wait = self.backoff * 2 ** attempt
+        after = response.headers.get('Retry-After') if response is not None else None
+        if after:
+            try:
+                wait = max(wait, float(after))
+            except ValueError:
+                try:
+                    wait = max(wait, parsedate_to_datetime(after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return wait
+
+    #==========================================
+    # Fetch one URL: from the cache if fresh,
+    # else a (conditional) GET with retries
+    #==========================================
+    def fetch(self, url):
+        meta, body = self.cache.get(url) if self.cache else (None, None)
+        if meta is not None and self.max_age is not None and time.time() - meta['fetched'] < self.max_age:
+            self._count('fresh')
+            return Page(url, meta['status'], body, meta['headers'], from_cache=True)
+        headers = HttpCache.conditional_headers(meta) if meta else {}
+
+        gate = self._gate(url)
+        response = error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count('retries')
+                time.sleep(self._retry_wait(attempt - 1, response))
+            try:
+                with gate:
+                    self._count('requests')
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as exc:
+                response, error = None, exc
+                continue
+            error = None
+            if response.status_code not in RETRY_STATUS:
+                break
+
+        if response is None:
+            self._count('errors')
+            return Page(url, 0, error=str(error))
+        if response.status_code == 304 and meta is not None:
+            self._count('not_modified')
+            self.cache.touch(url, meta)
+            return Page(url, meta['status'], body, meta['headers'], from_cache=True)
+        if response.status_code == 200 and self.cache:
+            self.cache.put(url, response)
+        if response.ok:
+            self._count('downloaded')
+        else:
+            self._count('errors')
+        return Page(url, response.status_code, response.content, dict(response.headers),
+                    error=None if response.ok else response.reason)
+
+    #==========================================
+    # Fetch many URLs in parallel; pages come
+    # back in the order of `urls`
+    #==========================================
+    def fetch_all(self, urls):
+        urls = list(urls)
+        with ThreadPoolExecutor(self.workers) as pool:
+            return list(pool.map(self.fetch, urls))
+
+    # Same, yielding each page as soon as it
+    # is done, e.g. to parse while crawling
+    def iter_fetch(self, urls):
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(self.fetch, url) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -8,9 +8,17 @@ import pandas as pd
 from lxml import html
 from lxml import etree
 
+import sys
 import requests
 import urllib3
 
+# Helper modules for this tutorial
+sys.path.append(r'C:\Users\bryan\source\repos\msis5193-pds1-master\web-scraping\assets')
+
+from fetcher import Fetcher
+from xpath_engine import XPathExtractor, table_to_frame
+from browser_pool import BrowserPool, PageScraper, firefox_factory
+
 # An alternative for scraping static pages;
 # this cannot use CSS selectors or XPath
 # selectors
@@ -80,6 +88,63 @@ i7data = pd.DataFrame(i7lists[0])
 i7data.dtypes
 
 
+#==============================================
+# Downloading many pages: Fetcher reuses one
+# connection pool, fetches a few pages at once
+# (at most 2 at a time from the same site,
+# half a second apart), retries failures and
+# saves each page in the folder http_cache
+#==============================================
+fetcher = Fetcher('http_cache', workers=8, per_host=2, delay=0.5)
+
+cpu_urls = [imdburl,
+            i7url,
+            'https://en.wikipedia.org/wiki/List_of_Intel_Core_i5_microprocessors',
+            'https://en.wikipedia.org/wiki/List_of_Intel_Core_i3_microprocessors']
+
+pages = fetcher.fetch_all(cpu_urls)
+pages
+
+fetcher.stats
+
+# Same tree as html.fromstring(resp.content)
+pages[0].tree().xpath(xp1)
+
+# Running it again only asks each site whether
+# the page changed (using the ETag and
+# Last-Modified headers saved with the page);
+# unchanged pages come from http_cache
+pages = fetcher.fetch_all(cpu_urls)
+[page.from_cache for page in pages]
+
+fetcher.stats
+
+
+#==============================================
+# Pulling the same fields from many pages:
+# describe the fields once as XPath selectors;
+# they are compiled once and reused on every
+# page. 'table' turns a <table> tag straight
+# into a data frame, without tostring() and
+# pd.read_html()
+#==============================================
+i7table2 = table_to_frame(i7table[0])
+i7table2.dtypes
+
+cpu_spec = {'title': '//h1[@id="firstHeading"]//text()',
+            'n_tables': ('//table[contains(@class, "wikitable")]', 'count'),
+            'first_table': ('//table[contains(@class, "wikitable")]', 'table')}
+
+cpu_extractor = XPathExtractor(cpu_spec)
+
+# The Wikipedia pages downloaded above, parsed
+# in several processes at once
+cpu_pages = cpu_extractor.extract_many(pages[1:], workers=3)
+
+for page in cpu_pages:
+    print(page['title'], page['n_tables'], page['first_table'].shape)
+
+
 #############################################
 #===============Read in data================#
 # Use the library Selenium to scrape web    #
@@ -110,3 +175,30 @@ module_elem = driver.find_element_by_css_selector('.content')
 module_elem.text
 
 driver.quit()
+
+
+#==============================================
+# Scraping many pages with Selenium: keep a
+# few headless browsers open and reuse them,
+# instead of starting Firefox for every page
+#==============================================
+browsers = BrowserPool(size=2, factory=firefox_factory(r'C:\Users\bryan\Documents\geckodriver.exe'))
+
+# All fields of a page are read with a single
+# script call inside the browser
+cpu_spec2 = {'title': '//h1[@id="firstHeading"]',
+             'first_table': ('//table[contains(@class, "wikitable")]', 'table')}
+
+cpu_pages2 = browsers.extract_all(cpu_urls[1:], cpu_spec2)
+browsers.stats
+
+# PageScraper tries a plain download with lxml
+# first and only uses a browser when a field
+# is missing, e.g. on pages built by JavaScript
+scraper = PageScraper(browsers, fetcher)
+imdb_page = scraper.scrape(imdburl, {'rating': xp1})
+imdb_page
+
+scraper.stats
+
+browsers.close()
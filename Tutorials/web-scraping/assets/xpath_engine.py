@@ -0,0 +1,242 @@
+#############################################
+#==========XPath Extraction Engine==========#
+# Compile the XPath selectors once, apply   #
+# them to many pages in parallel, and turn  #
+# <table> tags straight into data frames.   #
+#############################################
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+# Plain lxml elements parse faster than the
+# lxml.html classes; the XPaths are the same
+_PARSER = etree.HTMLParser()
+
+# Text of a cell, skipping hidden elements (as
+# pd.read_html does); <br> becomes a space
+_CELL_TEXT = etree.XPath('.//text()[not(ancestor::*[contains(translate(@style, " ", ""), "display:none")])]'
+                         ' | .//br')
+_SPAN = re.compile(r'\d+')
+_SPACES = re.compile(r'\s+')
+
+
+def _span(value):
+    if value is None:
+        return 1
+    found = _SPAN.search(value)
+    return min(max(int(found.group()), 1), 1000) if found else 1
+
+
+def cell_text(cell):
+    # Most cells hold plain text only
+    if not len(cell):
+        return _SPACES.sub(' ', cell.text or '').strip()
+    parts = [' ' if isinstance(part, etree._Element) else part for part in _CELL_TEXT(cell)]
+    return _SPACES.sub(' ', ''.join(parts)).strip()
+
+
+def _table_tr(table):
+    for child in table:
+        if child.tag == 'tr':
+            yield child
+        elif child.tag in ('thead', 'tbody', 'tfoot'):
+            for tr in child:
+                if tr.tag == 'tr':
+                    yield tr
+
+
+def parse(page):
+    if isinstance(page, str):
+        page = page.encode('utf-8')
+    return etree.fromstring(page, _PARSER)
+
+
+#==============================================
+# Rows of a <table> as lists of cell text,
+# with colspan and rowspan cells repeated in
+# every position they cover; returns the rows
+# and, per row, whether it is a header row
+#==============================================
+def table_rows(table):
+    rows, header = [], []
+    pending = {}
+    for tr in _table_tr(table):
+        cells = [c for c in tr if c.tag in ('td', 'th')]
+        out, all_th = [], True
+        col = i = 0
+        last = max(pending) if pending else -1
+        while i < len(cells) or col <= last:
+            if col in pending:
+                text, left, is_th = pending.pop(col)
+                if left > 1:
+                    pending[col] = (text, left - 1, is_th)
+                out.append(text)
+                all_th = all_th and is_th
+                col += 1
+                continue
+            if i == len(cells):
+                # A gap left of a later rowspan
+                out.append(None)
+                col += 1
+                continue
+            cell = cells[i]
+            i += 1
+            text = cell_text(cell)
+            is_th = cell.tag == 'th'
+            all_th = all_th and is_th
+            rowspan = _span(cell.get('rowspan'))
+            for _ in range(_span(cell.get('colspan'))):
+                if rowspan > 1:
+                    pending[col] = (text, rowspan - 1, is_th)
+                    last = max(last, col)
+                out.append(text)
+                col += 1
+        rows.append(out)
+        in_thead = tr.getparent().tag == 'thead'
+        header.append(bool(out) and (in_thead or all_th))
+    return rows, header
+
+
+#==============================================
+# One column of cell text: numbers (commas as
+# thousands separators) become float or int,
+# empty cells become missing values
+#==============================================
+def _column(values):
+    values = [None if v == '' else v for v in values]
+    try:
+        numbers = [float(v.replace(',', '')) if v is not None else np.nan for v in values]
+    except ValueError:
+        return values
+    if all(v is None for v in values):
+        return values
+    if None not in values and all(x.is_integer() for x in numbers):
+        return np.array(numbers, dtype='int64')
+    return np.array(numbers)
+
+
+#==============================================
+# A <table> element as a DataFrame without
+# converting it back to an HTML string: the
+# leading rows made of <th> cells (or in
+# <thead>) become the column names, and
+# columns of numbers are converted
+#==============================================
+def table_to_frame(table, header=None):
+    rows, is_header = table_rows(table)
+    if header is None:
+        header = 0
+        while header < len(rows) and is_header[header]:
+            header += 1
+    width = max((len(r) for r in rows), default=0)
+    rows = [r + [None] * (width - len(r)) for r in rows]
+    head, body = rows[:header], rows[header:]
+    if len(head) == 1:
+        # Repeated names get .1, .2, ... as in pd.read_html
+        seen = {}
+        names = []
+        for name in head[0]:
+            names.append(name if name not in seen else '%s.%d' % (name, seen[name]))
+            seen[name] = seen.get(name, 0) + 1
+        columns = pd.Index(names)
+    elif head:
+        columns = pd.MultiIndex.from_arrays(head)
+    else:
+        columns = pd.RangeIndex(width)
+    data = zip(*body) if body else [[]] * width
+    frame = pd.DataFrame({i: _column(list(values)) for i, values in enumerate(data)})
+    frame.columns = columns
+    return frame
+
+
+class XPathExtractor:
+    """Apply a field spec to parsed pages.
+
+    The spec maps a field name to an XPath expression, or to a pair
+    (expression, kind). The kinds are 'first' (first result as text,
+    the default), 'all' (list of text), 'count', 'table' (the first
+    matching <table> as a DataFrame) and 'tables' (a list of them).
+    Expressions are compiled into etree.XPath objects once, when the
+    extractor is created.
+    """
+
+    KINDS = ('first', 'all', 'count', 'table', 'tables')
+
+    def __init__(self, spec):
+        self.spec = dict(spec)
+        self.fields = {}
+        for name, expr in self.spec.items():
+            expr, kind = (expr, 'first') if isinstance(expr, str) else expr
+            if kind not in self.KINDS:
+                raise ValueError('%s: kind must be one of %s, not %r' % (name, self.KINDS, kind))
+            self.fields[name] = (etree.XPath(expr), kind)
+
+    @staticmethod
+    def _text(result):
+        if isinstance(result, etree._Element):
+            return cell_text(result)
+        return str(result).strip()
+
+    #==========================================
+    # One dict of field values for one tree
+    #==========================================
+    def extract(self, tree):
+        record = {}
+        for name, (xpath, kind) in self.fields.items():
+            found = xpath(tree)
+            if not isinstance(found, list):
+                # count(), string() and the like
+                record[name] = found
+            elif kind == 'first':
+                record[name] = self._text(found[0]) if found else None
+            elif kind == 'all':
+                record[name] = [self._text(x) for x in found]
+            elif kind == 'count':
+                record[name] = len(found)
+            elif kind == 'table':
+                record[name] = table_to_frame(found[0]) if found else None
+            else:
+                record[name] = [table_to_frame(t) for t in found]
+        return record
+
+    # Page content (bytes or str), a file name,
+    # or anything with a .content attribute such
+    # as a fetcher.Page
+    def extract_page(self, page):
+        if hasattr(page, 'content'):
+            page = page.content
+        elif isinstance(page, str) and not page.lstrip().startswith('<') and os.path.exists(page):
+            with open(page, 'rb') as f:
+                page = f.read()
+        return self.extract(parse(page))
+
+    #==========================================
+    # Extract from many pages in a process
+    # pool; each worker compiles the spec once
+    # when it starts. Records come back in the
+    # order of `pages`.
+    #==========================================
+    def extract_many(self, pages, workers=None, chunksize=16):
+        pages = [p.content if hasattr(p, 'content') else p for p in pages]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(pages) < 2:
+            return [self.extract_page(p) for p in pages]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.spec,)) as pool:
+            return list(pool.map(_extract_in_worker, pages, chunksize=chunksize))
+
+
+_worker_extractor = None
+
+
+def _init_worker(spec):
+    global _worker_extractor
+    _worker_extractor = XPathExtractor(spec)
+
+
+def _extract_in_worker(page):
+    return _worker_extractor.extract_page(page)